@@ -0,0 +1,284 @@
+"""
+Benchmark suite for training, features, prediction and the table model.
+
+Results are written as JSON with machine info, and can be compared with a
+stored baseline to flag regressions.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime, timedelta
+from fnmatch import fnmatch
+from functools import cache
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from library.boosting import (
+    DecisionTreeRegressor,
+    GradientBoostingRegressor,
+    Splitter,
+)
+from library.features import FEATURE_COLUMNS, calendar_features
+from library.functional import extract_features, model_predict
+from library.store import load_series
+from library.ui.table import PandasModel
+from PySide6.QtCore import QModelIndex
+
+PREDICTION_RANGES = {
+    "1d": timedelta(days=1),
+    "1m": timedelta(days=30),
+    "1y": timedelta(days=365),
+    "10y": timedelta(days=3652),
+}
+PREDICTION_START = datetime(2018, 1, 1)  # noqa: DTZ001
+
+type Case = tuple[str, int, Callable[[], Callable[[], object]]]
+
+
+@cache
+def synthetic_series(rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Generate hourly consumption with daily and yearly seasonality."""
+    hours = np.arange(rows, dtype=np.int64) + 40 * 8766
+    rng = np.random.default_rng(0)
+    consumption = (
+        15000
+        + 3000 * np.sin(2 * np.pi * hours / 24)
+        + 2000 * np.sin(2 * np.pi * hours / 8766)
+        + rng.normal(0, 500, rows)
+    )
+    return hours, consumption
+
+
+@cache
+def dataset(name: str, synthetic_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Get training matrix and target of a company or synthetic series."""
+    if name == "synthetic":
+        hours, y = synthetic_series(synthetic_rows)
+        x = calendar_features(hours)
+    else:
+        x, y = extract_features(name)
+    return np.asfortranarray(x, dtype=np.float64), y
+
+
+@cache
+def prediction(company: str, label: str) -> pd.DataFrame:
+    """Get prediction table of the company from `PREDICTION_START`."""
+    return model_predict(
+        company,
+        PREDICTION_START,
+        PREDICTION_START + PREDICTION_RANGES[label],
+    )
+
+
+def train(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_estimators: int,
+) -> GradientBoostingRegressor:
+    """Train a small model."""
+    model = GradientBoostingRegressor(
+        n_estimators=n_estimators,
+        learning_rate=0.0001,
+        max_depth=5,
+    )
+    model.train(x, y)
+    return model
+
+
+def table_scan(data_frame: pd.DataFrame) -> None:
+    """Read every cell of a fresh table model, as a full view scroll does."""
+    model = PandasModel(parent=None, data_frame=data_frame)
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    for row in range(model.rowCount()):
+        for column in range(model.columnCount()):
+            model.data(model.index(row, column))
+
+
+def dataset_cases(name: str, rows: int, args: Namespace) -> Iterator[Case]:
+    """Get training benchmark cases for one dataset."""
+
+    def tree_fit(splitter: Splitter) -> Callable[[], object]:
+        x, y = dataset(name, args.synthetic_rows)
+        tree = DecisionTreeRegressor(max_depth=5, splitter=splitter)
+        return lambda: tree.fit(x, y)
+
+    def boosting_train() -> Callable[[], object]:
+        x, y = dataset(name, args.synthetic_rows)
+        return lambda: train(x, y, args.n_estimators)
+
+    def boosting_predict() -> Callable[[], object]:
+        x, y = dataset(name, args.synthetic_rows)
+        model = train(x, y, args.n_estimators)
+        return lambda: model.predict(x)
+
+    yield f"tree.fit[{name},exact]", rows, lambda: tree_fit("exact")
+    yield f"tree.fit[{name},histogram]", rows, lambda: tree_fit("histogram")
+    yield f"boosting.train[{name}]", rows, boosting_train
+    yield f"boosting.predict[{name}]", rows, boosting_predict
+
+
+def cases(args: Namespace) -> Iterator[Case]:
+    """Get all benchmark cases, their row counts and setup functions."""
+
+    def calendar() -> Callable[[], object]:
+        hours, _ = synthetic_series(args.synthetic_rows)
+        return lambda: calendar_features(hours)
+
+    def predict(label: str) -> Callable[[], object]:
+        end = PREDICTION_START + PREDICTION_RANGES[label]
+        return lambda: model_predict(args.company, PREDICTION_START, end)
+
+    def scan() -> Callable[[], object]:
+        data_frame = prediction(args.company, "1y")
+        return lambda: table_scan(data_frame)
+
+    company_rows = len(load_series(args.company)[0])
+    yield "features.calendar[synthetic]", args.synthetic_rows, calendar
+    yield from dataset_cases("synthetic", args.synthetic_rows, args)
+    yield (
+        f"features.extract[{args.company}]",
+        company_rows,
+        lambda: lambda: extract_features(args.company),
+    )
+    yield from dataset_cases(args.company, company_rows, args)
+    for label, length in PREDICTION_RANGES.items():
+        yield (
+            f"model_predict[{args.company},{label}]",
+            length // timedelta(hours=1) + 1,
+            lambda label=label: predict(label),
+        )
+    yield (
+        f"table.scan[{args.company},1y]",
+        (PREDICTION_RANGES["1y"] // timedelta(hours=1) + 1)
+        * (len(FEATURE_COLUMNS) + 2),
+        scan,
+    )
+
+
+def measure(function: Callable[[], object], repeat: int) -> list[float]:
+    """Get run times of the function in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return times
+
+
+def machine_info() -> dict[str, object]:
+    """Describe the machine and code the benchmarks ran on."""
+    commit = subprocess.run(
+        ["git", "rev-parse", "HEAD"],  # noqa: S607
+        capture_output=True,
+        text=True,
+        check=False,
+    ).stdout.strip()
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "commit": commit or None,
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> bool:
+    """Print changes against the baseline and check for regressions."""
+    print(f"\n{'benchmark':<40} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    regressed = False
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        status = ""
+        if ratio > 1 + tolerance:
+            status = "SLOWER"
+            regressed = True
+        elif ratio < 1 - tolerance:
+            status = "faster"
+        print(
+            f"{name:<40} {baseline[name]['min']:>10.4f} "
+            f"{result['min']:>10.4f} {ratio:>7.2f} {status}",
+        )
+    return regressed
+
+
+def main() -> None:
+    """Run the benchmark suite."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--company", default="PJME")
+    parser.add_argument("--synthetic-rows", type=int, default=100_000)
+    parser.add_argument("--n-estimators", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        default=["*"],
+        help="run only benchmarks matching these shell patterns",
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown against the baseline that fails the run",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'benchmark':<40} {'min, s':>10} {'median, s':>10} {'items/s':>12}",
+    )
+    results = {}
+    for name, items, setup in cases(args):
+        if not any(fnmatch(name, pattern) for pattern in args.only):
+            continue
+        times = measure(setup(), args.repeat)
+        results[name] = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "items": items,
+            "times": times,
+        }
+        print(
+            f"{name:<40} {min(times):>10.4f} "
+            f"{statistics.median(times):>10.4f} {items / min(times):>12.0f}",
+        )
+
+    report = {
+        "created": datetime.now(tz=UTC).isoformat(),
+        "machine": machine_info(),
+        "config": {
+            "company": args.company,
+            "synthetic_rows": args.synthetic_rows,
+            "n_estimators": args.n_estimators,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Export throughput benchmark for prediction tables."""
+
+import tempfile
+from argparse import ArgumentParser
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from library.export import FRAME_WRITERS, export_frame
+from library.functional import model_predict
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--company", default="PJME")
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default="2018-01-01",
+    )
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=tuple(FRAME_WRITERS),
+        default=tuple(FRAME_WRITERS),
+    )
+    args = parser.parse_args()
+
+    data_frame = model_predict(
+        args.company,
+        args.start,
+        args.start.replace(year=args.start.year + args.years),
+    )
+
+    print(f"{args.company}: {len(data_frame)} rows")
+    print(f"{'format':>8} {'seconds':>10} {'rows/s':>10} {'MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in args.formats:
+            path = Path(directory) / f"export{suffix}"
+            start = perf_counter()
+            export_frame(data_frame, path)
+            elapsed = perf_counter() - start
+            print(
+                f"{suffix:>8} {elapsed:>10.3f} "
+                f"{len(data_frame) / elapsed:>10.0f} "
+                f"{path.stat().st_size / 2**20:>8.2f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
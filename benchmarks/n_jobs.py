@@ -0,0 +1,85 @@
+"""Thread scaling benchmark for split search."""
+
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+from library.boosting import GradientBoostingRegressor, Splitter
+from library.functional import extract_features
+
+
+def train_time(
+    x: np.ndarray,
+    y: np.ndarray,
+    splitter: Splitter,
+    n_estimators: int,
+    n_jobs: int,
+) -> tuple[float, GradientBoostingRegressor]:
+    """Train a model and return the elapsed time with the model."""
+    model = GradientBoostingRegressor(
+        n_estimators=n_estimators,
+        learning_rate=0.0001,
+        max_depth=5,
+        splitter=splitter,
+        n_jobs=n_jobs,
+    )
+    start = perf_counter()
+    model.train(x, y)
+    return perf_counter() - start, model
+
+
+def same_trees(
+    first: GradientBoostingRegressor,
+    second: GradientBoostingRegressor,
+) -> bool:
+    """Check that two models consist of identical trees."""
+    return all(
+        np.array_equal(a.feature, b.feature)
+        and np.array_equal(a.threshold, b.threshold, equal_nan=True)
+        and np.array_equal(a.value, b.value, equal_nan=True)
+        for a, b in zip(first.trees, second.trees, strict=True)
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--company", default="PJME")
+    parser.add_argument(
+        "--splitter",
+        choices=("exact", "histogram"),
+        default="exact",
+    )
+    parser.add_argument("--n-estimators", type=int, default=5)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+    )
+    args = parser.parse_args()
+
+    x, y = extract_features(args.company)
+    x = np.asfortranarray(x, dtype=np.float64)
+
+    print(f"{args.company}: {x.shape[0]} rows, {x.shape[1]} features")
+    print(f"{'threads':>8} {'seconds':>10} {'speedup':>8} {'same':>5}")
+    baseline_time, baseline_model = None, None
+    for n_jobs in args.threads:
+        elapsed, model = train_time(
+            x,
+            y,
+            args.splitter,
+            args.n_estimators,
+            n_jobs,
+        )
+        if baseline_model is None:
+            baseline_time, baseline_model = elapsed, model
+        print(
+            f"{n_jobs:>8} {elapsed:>10.3f} {baseline_time / elapsed:>8.2f} "
+            f"{same_trees(baseline_model, model)!s:>5}",
+        )
+
+
+if __name__ == "__main__":
+    main()
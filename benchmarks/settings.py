@@ -0,0 +1,92 @@
+"""Per-call cost benchmark for settings access."""
+
+import tempfile
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+from library.ui.settings import SettingsStore
+from msgspec import DecodeError
+from msgspec.toml import decode, encode
+from PySide6.QtCore import QCoreApplication
+
+
+def file_get(path: Path, name: str, default: object = None) -> object:
+    """Read a setting from the file on every call, as before the store."""
+    path.touch()
+    with path.open(mode="r") as file:
+        try:
+            data = decode(file.read())
+        except DecodeError:
+            data = {}
+    return data.get(name, default)
+
+
+def file_set(path: Path, name: str, value: object) -> object:
+    """Rewrite the whole file on every call, as before the store."""
+    path.touch()
+    with path.open(mode="r") as file:
+        try:
+            data = decode(file.read())
+        except DecodeError:
+            data = {}
+    data[name] = value
+    with path.open(mode="wb") as file:
+        file.write(encode(data))
+    return value
+
+
+def call_time(function: Callable[[int], object], calls: int) -> float:
+    """Get mean time of one call in microseconds."""
+    start = perf_counter()
+    for i in range(calls):
+        function(i)
+    return (perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10_000)
+    args = parser.parse_args()
+    # Таймеру отложенной записи нужен экземпляр приложения Qt
+    _app = QCoreApplication([])
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = Path(directory) / "file.toml"
+        store = SettingsStore(Path(directory) / "store.toml")
+        file_set(file_path, "plot_marker", "o")
+        store.set("plot_marker", "o")
+        store.flush()
+
+        results = {
+            "get": (
+                call_time(
+                    lambda _: file_get(file_path, "plot_marker"),
+                    args.calls,
+                ),
+                call_time(lambda _: store.get("plot_marker"), args.calls),
+            ),
+            "set": (
+                call_time(
+                    lambda i: file_set(file_path, "plot_color", f"#{i:06x}"),
+                    args.calls,
+                ),
+                call_time(
+                    lambda i: store.set("plot_color", f"#{i:06x}"),
+                    args.calls,
+                ),
+            ),
+        }
+        store.flush()
+
+    print(f"{'call':>5} {'file, us':>10} {'store, us':>10} {'speedup':>8}")
+    for call, (before, after) in results.items():
+        print(
+            f"{call:>5} {before:>10.2f} {after:>10.2f} {before / after:>8.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
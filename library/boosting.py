@@ -1,30 +1,173 @@
 """ML model module."""
 
-from typing import Self
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Literal, Self
 
 import numpy as np
 from numpy import (
     array,
+    bincount,
+    cumsum,
     float32,
     float64,
     full,
     full_like,
     mean,
     ndarray,
+    quantile,
+    searchsorted,
+    uint8,
     unique,
 )
 
+from .instrumentation import count, span
+
+type Splitter = Literal["exact", "histogram"]
+
+MAX_BINS = 256
+TIE_TOLERANCE = 1e-10
+TREE_LEAF = -1
+
+
+@dataclass(frozen=True)
+class TrainingProgress:
+    """State of gradient boosting training after fitting a tree."""
+
+    n_trees: int
+    n_estimators: int
+    elapsed: float
+    loss: float
+    validation_loss: float | None
+
+
+type ProgressCallback = Callable[[TrainingProgress], None]
+
+
+def as_float_array(x: ndarray) -> ndarray:
+    """Convert features to a float array, keeping float32 as is."""
+    x = np.asarray(x)
+    if x.dtype.type not in {float32, float64}:
+        x = x.astype(float64)
+    return x
+
+
+def effective_n_jobs(n_jobs: int) -> int:
+    """Resolve `n_jobs`, where negative values count from the CPU count."""
+    if n_jobs == 0:
+        msg = "n_jobs must not be zero"
+        raise ValueError(msg)
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def apply_tree(
+    x: ndarray,
+    feature: ndarray,
+    threshold: ndarray,
+    left: ndarray,
+    right: ndarray,
+) -> ndarray:
+    """
+    Find the leaf index of every sample in a tree stored as flat arrays.
+
+    All samples descend the tree together, one level per step.
+    Thresholds are compared in the precision of `x`.
+    """
+    threshold = threshold.astype(x.dtype, copy=False)
+    leaves = np.zeros(x.shape[0], dtype=np.intp)
+    rows = np.arange(x.shape[0], dtype=np.intp)
+    while len(rows):
+        nodes = leaves[rows]
+        node_feature = feature[nodes]
+        is_split = node_feature != TREE_LEAF
+        rows, nodes, node_feature = (
+            rows[is_split],
+            nodes[is_split],
+            node_feature[is_split],
+        )
+        go_left = x[rows, node_feature] <= threshold[nodes]
+        leaves[rows] = np.where(go_left, left[nodes], right[nodes])
+    return leaves
+
+
+class BinMapper:
+    """Quantile feature binner for histogram split search."""
+
+    def __init__(self: Self, max_bins: int = 255) -> None:
+        """Construct bin mapper."""
+        if not 1 < max_bins <= MAX_BINS:
+            msg = f"max_bins must be in range (1, {MAX_BINS}], got {max_bins}"
+            raise ValueError(msg)
+        self.max_bins = max_bins
+        self.bin_thresholds: list[ndarray] = []
+
+    def fit(self: Self, x: ndarray) -> Self:
+        """Find bin upper edges for every feature."""
+        self.bin_thresholds = []
+        for feature_idx in range(x.shape[1]):
+            values = unique(x[:, feature_idx])
+            if len(values) > self.max_bins:
+                # Верхние границы бинов - реальные значения признака
+                values = unique(
+                    quantile(
+                        x[:, feature_idx],
+                        np.linspace(0, 1, self.max_bins + 1)[1:],
+                        method="inverted_cdf",
+                    ),
+                )
+            self.bin_thresholds.append(values)
+        return self
+
+    def transform(self: Self, x: ndarray) -> ndarray:
+        """Map features to bin indices."""
+        binned = np.empty(x.shape, dtype=uint8, order="F")
+        for feature_idx, thresholds in enumerate(self.bin_thresholds):
+            binned[:, feature_idx] = searchsorted(
+                thresholds,
+                x[:, feature_idx],
+                side="left",
+            ).clip(max=len(thresholds) - 1)
+        return binned
+
+    def fit_transform(self: Self, x: ndarray) -> ndarray:
+        """Fit bin mapper and map features to bin indices."""
+        return self.fit(x).transform(x)
+
 
 class DecisionTreeRegressor:
     """Decision tree regressor."""
 
-    def __init__(self: Self, max_depth: int = 3) -> None:
+    def __init__(
+        self: Self,
+        max_depth: int = 3,
+        splitter: Splitter = "exact",
+        max_bins: int = 255,
+        n_jobs: int = 1,
+    ) -> None:
         """Construct decision tree regressor."""
+        if splitter not in {"exact", "histogram"}:
+            msg = f"Unknown splitter: {splitter!r}"
+            raise ValueError(msg)
         self.max_depth = max_depth
-        self.tree = None
+        self.splitter = splitter
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.feature = np.empty(0, dtype=np.intp)
+        self.threshold = np.empty(0, dtype=float64)
+        self.left = np.empty(0, dtype=np.intp)
+        self.right = np.empty(0, dtype=np.intp)
+        self.value = np.empty(0, dtype=float64)
 
     class Node:
-        def __init__(
+        """Node of trees pickled before the array-backed storage."""
+
+        def __init__(  # noqa: D107
             self: Self,
             feature_idx=None,
             threshold=None,
@@ -38,112 +181,533 @@ class DecisionTreeRegressor:
             self.right = right
             self.value = value
 
-    def _mse(self: Self, y: ndarray) -> float32:
-        return mean((y - np.mean(y)) ** 2)
+    def __setstate__(self: Self, state: dict) -> None:
+        """Restore a tree, converting old pickled `Node` graphs."""
+        tree = state.pop("tree", None)
+        state = {"splitter": "exact", "max_bins": 255, "n_jobs": 1} | state
+        self.__dict__.update(state)
+        if tree is not None:
+            self._nodes = []
+            self._add_legacy_node(tree)
+            self._finish_nodes()
 
-    def _best_split(self: Self, x: ndarray, y: ndarray) -> tuple:
+    def _add_legacy_node(self: Self, node: Node) -> int:
+        if node.value is not None:
+            return self._add_leaf(node.value)
+        node_id = self._add_split(node.feature_idx, node.threshold)
+        self._nodes[node_id][2] = self._add_legacy_node(node.left)
+        self._nodes[node_id][3] = self._add_legacy_node(node.right)
+        return node_id
+
+    def _add_leaf(self: Self, value: float) -> int:
+        self._nodes.append([TREE_LEAF, np.nan, TREE_LEAF, TREE_LEAF, value])
+        return len(self._nodes) - 1
+
+    def _add_split(self: Self, feature_idx: int, threshold: float) -> int:
+        self._nodes.append(
+            [feature_idx, threshold, TREE_LEAF, TREE_LEAF, np.nan],
+        )
+        return len(self._nodes) - 1
+
+    def _finish_nodes(self: Self) -> None:
+        """Move built nodes into flat parallel arrays."""
+        feature, threshold, left, right, value = zip(*self._nodes, strict=True)
+        self.feature = array(feature, dtype=np.intp)
+        self.threshold = array(threshold, dtype=float64)
+        self.left = array(left, dtype=np.intp)
+        self.right = array(right, dtype=np.intp)
+        self.value = array(value, dtype=float64)
+        del self._nodes
+
+    @property
+    def node_count(self: Self) -> int:
+        """Number of nodes in the tree."""
+        return len(self.feature)
+
+    @staticmethod
+    def _split_mse(
+        left_sum: ndarray,
+        left_square_sum: ndarray,
+        left_count: ndarray,
+        totals: tuple[float, float, int],
+    ) -> ndarray:
+        """Weighted MSE of both sides for every candidate threshold."""
+        total_sum, total_square_sum, total_count = totals
+        right_sum = total_sum - left_sum
+        right_square_sum = total_square_sum - left_square_sum
+        right_count = total_count - left_count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mse = (
+                left_square_sum
+                - left_sum**2 / left_count
+                + right_square_sum
+                - right_sum**2 / right_count
+            ) / total_count
+        mse[(left_count == 0) | (right_count == 0)] = np.inf
+        return mse
+
+    def _best_split(
+        self: Self,
+        x: ndarray,
+        y: ndarray,
+        binned: ndarray | None,
+        rows: ndarray,
+    ) -> tuple:
         best_mse = float("inf")
         best_feature, best_threshold = None, None
 
-        for feature_idx in range(x.shape[1]):
-            thresholds = unique(x[:, feature_idx])
-            for threshold in thresholds:
-                left_mask = x[:, feature_idx] <= threshold
-                right_mask = ~left_mask
+        # Центрируем y, чтобы суммы квадратов не теряли точность
+        y = y[rows]
+        y -= np.mean(y)
+        totals = (np.sum(y), np.sum(y**2), len(y))
+        # Разбиения, почти равные из-за округления, считаем равными:
+        # побеждает первый признак и наименьший порог
+        tolerance = TIE_TOLERANCE * totals[1] / totals[2]
 
-                if np.sum(left_mask) == 0 or np.sum(right_mask) == 0:
-                    continue
+        def feature_best_split(feature_idx: int) -> tuple:
+            if binned is not None:
+                thresholds, mse = self._histogram_candidates(
+                    binned[rows, feature_idx],
+                    self.bin_mapper.bin_thresholds[feature_idx],
+                    y,
+                    totals,
+                )
+            else:
+                thresholds, mse = self._exact_candidates(
+                    x[rows, feature_idx],
+                    y,
+                    totals,
+                )
+            if len(mse) == 0:
+                return float("inf"), None
 
-                mse = (
-                    self._mse(y[left_mask]) * np.sum(left_mask)
-                    + self._mse(y[right_mask]) * np.sum(right_mask)
-                ) / len(y)
+            candidate_idx = int(np.argmax(mse <= mse.min() + tolerance))
+            return mse[candidate_idx], thresholds[candidate_idx]
 
-                if mse < best_mse:
-                    best_mse = mse
-                    best_feature = feature_idx
-                    best_threshold = threshold
+        # Признаки считаются параллельно, но результаты сливаются по порядку,
+        # поэтому дерево не зависит от числа потоков
+        map_features = self._executor.map if self._executor else map
+        for feature_idx, (mse, threshold) in zip(
+            self._features,
+            map_features(feature_best_split, self._features),
+            strict=True,
+        ):
+            if mse < best_mse - tolerance:
+                best_mse = mse
+                best_feature = feature_idx
+                best_threshold = threshold
 
         return best_feature, best_threshold
 
+    def _exact_candidates(
+        self: Self,
+        feature: ndarray,
+        y: ndarray,
+        totals: tuple[float, float, int],
+    ) -> tuple[ndarray, ndarray]:
+        order = np.argsort(feature, kind="stable")
+        sorted_feature = feature[order]
+        sorted_y = y[order]
+
+        # Кандидаты - последние позиции каждого уникального значения,
+        # кроме максимального (справа было бы пусто)
+        positions = np.flatnonzero(sorted_feature[:-1] != sorted_feature[1:])
+        left_sum = cumsum(sorted_y)[positions]
+        left_square_sum = cumsum(sorted_y**2)[positions]
+        mse = self._split_mse(
+            left_sum,
+            left_square_sum,
+            positions + 1,
+            totals,
+        )
+        return sorted_feature[positions], mse
+
+    def _histogram_candidates(
+        self: Self,
+        feature: ndarray,
+        thresholds: ndarray,
+        y: ndarray,
+        totals: tuple[float, float, int],
+    ) -> tuple[ndarray, ndarray]:
+        n_bins = len(thresholds)
+        sums = bincount(feature, weights=y, minlength=n_bins)
+        square_sums = bincount(feature, weights=y**2, minlength=n_bins)
+        counts = bincount(feature, minlength=n_bins)
+
+        # Порог после бина b: слева бины 0..b, справа остальные
+        mse = self._split_mse(
+            cumsum(sums[:-1]),
+            cumsum(square_sums[:-1]),
+            cumsum(counts[:-1]),
+            totals,
+        )
+        return thresholds[:-1], mse
+
     def _build_tree(
         self: Self,
         x: ndarray,
         y: ndarray,
+        binned: ndarray | None,
+        rows: ndarray,
         depth: int = 0,
-    ) -> Node:
-        if depth >= self.max_depth or len(unique(y)) == 1:
-            return self.Node(value=mean(y))
+    ) -> int:
+        """
+        Build a subtree on the rows of a node and return its node id.
 
-        feature_idx, threshold = self._best_split(x, y)
+        `rows` is a contiguous slice of the shared row index array. It is
+        stably partitioned in place through index buffers of the node size,
+        so children get sub-slices of it and the feature matrix is never
+        copied.
+        """
+        node_y = y[rows]
+        if depth >= self.max_depth or node_y.min() == node_y.max():
+            return self._add_training_leaf(node_y, rows)
+
+        feature_idx, threshold = self._best_split(x, y, binned, rows)
         if feature_idx is None:
-            return self.Node(value=mean(y))
+            return self._add_training_leaf(node_y, rows)
 
-        left_mask = x[:, feature_idx] <= threshold
-        right_mask = ~left_mask
+        left_mask = x[rows, feature_idx] <= threshold
+        n_left = int(np.count_nonzero(left_mask))
+        # Устойчивое разбиение: правая часть копируется до перезаписи
+        right_rows = rows[~left_mask]
+        rows[:n_left] = rows[left_mask]
+        rows[n_left:] = right_rows
 
-        left = self._build_tree(x[left_mask], y[left_mask], depth + 1)
-        right = self._build_tree(x[right_mask], y[right_mask], depth + 1)
+        node_id = self._add_split(feature_idx, threshold)
+        self._nodes[node_id][2] = self._build_tree(
+            x,
+            y,
+            binned,
+            rows[:n_left],
+            depth + 1,
+        )
+        self._nodes[node_id][3] = self._build_tree(
+            x,
+            y,
+            binned,
+            rows[n_left:],
+            depth + 1,
+        )
+        return node_id
 
-        return self.Node(feature_idx, threshold, left, right)
+    def _add_training_leaf(self: Self, node_y: ndarray, rows: ndarray) -> int:
+        leaf_id = self._add_leaf(mean(node_y))
+        self._row_leaves[rows] = leaf_id
+        return leaf_id
 
-    def fit(self: Self, x: ndarray, y: ndarray) -> None:
-        self.tree = self._build_tree(x, y)
+    def fit(  # noqa: PLR0913
+        self: Self,
+        x: ndarray,
+        y: ndarray,
+        binned: ndarray | None = None,
+        bin_mapper: BinMapper | None = None,
+        executor: Executor | None = None,
+        *,
+        sample_indices: ndarray | None = None,
+        feature_indices: ndarray | None = None,
+    ) -> ndarray:
+        """
+        Fit the tree and return the leaf index of every training sample.
 
-    def _predict_sample(self: Self, x, node) -> ndarray:
-        if node.value is not None:
-            return node.value
-        if x[node.feature_idx] <= node.threshold:
-            return self._predict_sample(x, node.left)
-        return self._predict_sample(x, node.right)
+        In histogram mode `binned` and `bin_mapper` may be passed to reuse
+        features binned once for the whole ensemble. Likewise `executor`
+        may be shared instead of starting a thread pool of `n_jobs` workers
+        for every tree.
+
+        Only rows in `sample_indices` and features in `feature_indices` are
+        used if given; rows left out get `TREE_LEAF` as their leaf index.
+        """
+        x = np.asarray(x, dtype=float64)
+        y = np.asarray(y, dtype=float64)
+        self.bin_mapper = None
+        if self.splitter == "histogram":
+            if bin_mapper is None:
+                bin_mapper = BinMapper(self.max_bins)
+                binned = bin_mapper.fit_transform(x)
+            elif binned is None:
+                binned = bin_mapper.transform(x)
+            self.bin_mapper = bin_mapper
+        else:
+            binned = None
+        if sample_indices is None:
+            rows = np.arange(len(y), dtype=np.intp)
+        else:
+            rows = np.array(sample_indices, dtype=np.intp)
+        if feature_indices is None:
+            self._features = range(x.shape[1])
+        else:
+            self._features = np.sort(feature_indices).tolist()
+        self._nodes = []
+        self._row_leaves = full(len(y), TREE_LEAF, dtype=np.intp)
+        with self._thread_pool(executor) as self._executor:
+            self._build_tree(x, y, binned, rows)
+        self._finish_nodes()
+        row_leaves = self._row_leaves
+        del self.bin_mapper, self._row_leaves, self._executor, self._features
+        return row_leaves
 
-    def predict(self: Self, X: ndarray) -> ndarray:
-        return array([self._predict_sample(x, self.tree) for x in X])
+    def _thread_pool(
+        self: Self,
+        executor: Executor | None,
+    ) -> ThreadPoolExecutor | nullcontext:
+        if executor is None and effective_n_jobs(self.n_jobs) > 1:
+            return ThreadPoolExecutor(effective_n_jobs(self.n_jobs))
+        return nullcontext(executor)
+
+    def apply(self: Self, x: ndarray) -> ndarray:
+        """Find the leaf index of every sample."""
+        return apply_tree(
+            as_float_array(x),
+            self.feature,
+            self.threshold,
+            self.left,
+            self.right,
+        )
+
+    def predict(self: Self, x: ndarray) -> ndarray:
+        """Predict target values."""
+        return self.value[self.apply(x)]
 
 
 class GradientBoostingRegressor:
     """Gradient boosting regressor."""
 
-    def __init__(
+    param_names = (
+        "n_estimators",
+        "learning_rate",
+        "max_depth",
+        "splitter",
+        "max_bins",
+        "n_jobs",
+        "patience",
+        "subsample",
+        "colsample",
+        "random_state",
+    )
+
+    def __init__(  # noqa: PLR0913
         self: Self,
         n_estimators: int = 100,
         learning_rate: float = 0.1,
         max_depth: int = 3,
+        *,
+        splitter: Splitter = "histogram",
+        max_bins: int = 255,
+        n_jobs: int = 1,
+        patience: int | None = None,
+        subsample: float = 1.0,
+        colsample: float = 1.0,
+        random_state: int | None = None,
     ) -> None:
         """Initialize a gradient boosting regressor."""
+        for name, fraction in (
+            ("subsample", subsample),
+            ("colsample", colsample),
+        ):
+            if not 0 < fraction <= 1:
+                msg = f"{name} must be in range (0, 1], got {fraction}"
+                raise ValueError(msg)
         self.n_estimators = n_estimators
         self.learning_rate = learning_rate
         self.max_depth = max_depth
+        self.splitter = splitter
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.patience = patience
+        self.subsample = subsample
+        self.colsample = colsample
+        self.random_state = random_state
         self.trees = []
         self.initial_prediction = None
+        self.validation_loss = []
 
-    def train(self: Self, x: ndarray, y: ndarray) -> None:
-        """Train a gradient boosting regressor."""
-        # Начальное предсказание - среднее значение y
-        self.initial_prediction = mean(y)
-        current_pred = full_like(
-            y,
-            self.initial_prediction,
-            dtype=float64,
-        )
+    def get_params(self: Self) -> dict[str, object]:
+        """Get constructor parameters of the model."""
+        return {name: getattr(self, name) for name in self.param_names}
+
+    def __setstate__(self: Self, state: dict) -> None:
+        """Restore a model, filling parameters added after it was saved."""
+        defaults = {
+            "splitter": "histogram",
+            "max_bins": 255,
+            "n_jobs": 1,
+            "patience": None,
+            "subsample": 1.0,
+            "colsample": 1.0,
+            "random_state": None,
+            "validation_loss": [],
+        }
+        self.__dict__.update(defaults | state)
+
+    def train(
+        self: Self,
+        x: ndarray,
+        y: ndarray,
+        *,
+        warm_start: bool = False,
+        validation: tuple[ndarray, ndarray] | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> None:
+        """
+        Train a gradient boosting regressor.
 
-        for _ in range(self.n_estimators):
-            # Вычисляем остатки (антиградиент)
-            residuals = y - current_pred
+        With `warm_start` the already trained trees are kept and only the
+        missing ones up to `n_estimators` are fitted on their residuals.
 
-            # Обучаем дерево на остатках
-            tree = DecisionTreeRegressor(max_depth=self.max_depth)
-            tree.fit(x, residuals)
+        Each tree sees a random `subsample` fraction of rows and `colsample`
+        fraction of features drawn from a generator seeded by `random_state`,
+        while residuals are updated on all rows.
 
-            # Делаем предсказание и обновляем текущее предсказание
-            pred = tree.predict(x)
-            current_pred += self.learning_rate * pred
-            print(f"Estimator trained {_ + 1}/{self.n_estimators}")
-            # Сохраняем дерево
-            self.trees.append(tree)
+        If a `validation` set is given, its MSE before the first new tree
+        and after every tree is stored in `validation_loss`. With `patience`
+        set, training stops once the loss has not improved for that many
+        trees, and the trees after the best one are dropped.
+
+        `progress` is called after every tree with the training MSE.
+        """
+        with span("boosting.train", rows=len(y)) as attributes:
+            self._train(x, y, warm_start, validation, progress)
+            attributes["trees"] = len(self.trees)
+
+    def _train(
+        self: Self,
+        x: ndarray,
+        y: ndarray,
+        warm_start: bool,  # noqa: FBT001
+        validation: tuple[ndarray, ndarray] | None,
+        progress: ProgressCallback | None,
+    ) -> None:
+        start = perf_counter()
+        # Колонки подряд в памяти: деревья читают признаки по столбцам
+        x = np.asfortranarray(x, dtype=float64)
+        y = np.asarray(y, dtype=float64)
+
+        # Бины считаются один раз и переиспользуются всеми деревьями
+        bin_mapper = binned = None
+        if self.splitter == "histogram":
+            bin_mapper = BinMapper(self.max_bins)
+            binned = bin_mapper.fit_transform(x)
+
+        if warm_start and self.trees:
+            # Продолжаем от предсказаний уже обученных деревьев
+            current_pred = self.predict(x)
+        else:
+            # Начальное предсказание - среднее значение y
+            self.trees = []
+            self.initial_prediction = mean(y)
+            current_pred = full_like(
+                y,
+                self.initial_prediction,
+                dtype=float64,
+            )
+
+        if validation is not None:
+            x_val = np.asarray(validation[0], dtype=float64)
+            y_val = np.asarray(validation[1], dtype=float64)
+            # Предсказания на валидации копятся по одному дереву
+            val_pred = self.predict(x_val)
+            self.validation_loss = [mean((y_val - val_pred) ** 2)]
+
+        rng = np.random.default_rng(self.random_state)
+        n_jobs = effective_n_jobs(self.n_jobs)
+        with (
+            ThreadPoolExecutor(n_jobs) if n_jobs > 1 else nullcontext()
+        ) as executor:
+            for _ in range(len(self.trees), self.n_estimators):
+                # Вычисляем остатки (антиградиент)
+                residuals = y - current_pred
+
+                # Обучаем дерево на остатках
+                tree = DecisionTreeRegressor(
+                    max_depth=self.max_depth,
+                    splitter=self.splitter,
+                    max_bins=self.max_bins,
+                    n_jobs=self.n_jobs,
+                )
+                with span("boosting.fit_tree", tree=len(self.trees)):
+                    leaves = tree.fit(
+                        x,
+                        residuals,
+                        binned,
+                        bin_mapper,
+                        executor,
+                        sample_indices=self._draw(
+                            rng,
+                            x.shape[0],
+                            self.subsample,
+                        ),
+                        feature_indices=self._draw(
+                            rng,
+                            x.shape[1],
+                            self.colsample,
+                        ),
+                    )
+                count("boosting.trees_fitted")
+
+                # Листья строк известны после обучения - повторно
+                # предсказываем только строки вне подвыборки
+                out_of_bag = leaves == TREE_LEAF
+                if out_of_bag.any():
+                    leaves[out_of_bag] = tree.apply(x[out_of_bag])
+                current_pred += self.learning_rate * tree.value[leaves]
+                # Сохраняем дерево
+                self.trees.append(tree)
+
+                if validation is not None:
+                    val_pred += self.learning_rate * tree.predict(x_val)
+                    self.validation_loss.append(mean((y_val - val_pred) ** 2))
+                if progress is not None:
+                    progress(
+                        TrainingProgress(
+                            n_trees=len(self.trees),
+                            n_estimators=self.n_estimators,
+                            elapsed=perf_counter() - start,
+                            loss=float(mean((y - current_pred) ** 2)),
+                            validation_loss=(
+                                None
+                                if validation is None
+                                else float(self.validation_loss[-1])
+                            ),
+                        ),
+                    )
+                if validation is not None and self._should_stop():
+                    break
+
+        if validation is not None and self.patience is not None:
+            self._drop_trees_after_best()
+
+    @staticmethod
+    def _draw(
+        rng: np.random.Generator,
+        size: int,
+        fraction: float,
+    ) -> ndarray | None:
+        """Draw sorted indices of a random fraction, `None` meaning all."""
+        if fraction >= 1:
+            return None
+        n_draws = max(round(size * fraction), 1)
+        return np.sort(rng.choice(size, n_draws, replace=False))
+
+    def _rounds_without_improvement(self: Self) -> int:
+        best_idx = int(np.argmin(self.validation_loss))
+        return len(self.validation_loss) - 1 - best_idx
+
+    def _should_stop(self: Self) -> bool:
+        return (
+            self.patience is not None
+            and self._rounds_without_improvement() >= self.patience
+        )
+
+    def _drop_trees_after_best(self: Self) -> None:
+        extra_trees = self._rounds_without_improvement()
+        if extra_trees:
+            del self.trees[-extra_trees:]
+            del self.validation_loss[-extra_trees:]
 
     def predict(self: Self, x: ndarray) -> ndarray:
         """Predict energy consumption."""
+        x = as_float_array(x)
         # Начинаем с начального предсказания
         y_pred = full(x.shape[0], self.initial_prediction, dtype=float64)
 
@@ -152,3 +716,12 @@ class GradientBoostingRegressor:
             y_pred += self.learning_rate * tree.predict(x)
 
         return y_pred
+
+    def staged_predict(self: Self, x: ndarray) -> Iterator[ndarray]:
+        """Predict energy consumption after each tree of the ensemble."""
+        x = as_float_array(x)
+        y_pred = full(x.shape[0], self.initial_prediction, dtype=float64)
+
+        for tree in self.trees:
+            y_pred += self.learning_rate * tree.predict(x)
+            yield y_pred.copy()
@@ -0,0 +1,242 @@
+"""Streaming prediction export module."""
+
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import suppress
+from datetime import datetime
+from html import escape as escape_html
+from pathlib import Path
+from xml.sax.saxutils import escape as escape_xml
+
+import numpy as np
+from openpyxl import Workbook
+from pandas import DataFrame
+
+from .files import atomic_write
+from .functional import iter_predictions, prediction_length
+from .instrumentation import profiled
+
+EXPORT_CHUNK_SIZE = 4096
+PREDICTION_FORMATS = (".csv", ".npy")
+
+
+class ExportCancelledError(Exception):
+    """Export was cancelled before completion."""
+
+
+def frame_chunks(
+    data_frame: DataFrame,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    *,
+    progress: Callable[[int, int], None] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
+) -> Iterator[DataFrame]:
+    """
+    Split a frame into row chunks for the streaming writers.
+
+    An empty frame yields a single empty chunk, so the writers still get
+    its columns. `progress` gets the number of written and total rows after
+    each chunk, and a true `is_cancelled` result raises
+    `ExportCancelledError`.
+    """
+    for start in range(0, max(len(data_frame), 1), chunk_size):
+        if is_cancelled is not None and is_cancelled():
+            msg = "Export was cancelled"
+            raise ExportCancelledError(msg)
+        yield data_frame.iloc[start : start + chunk_size]
+        if progress is not None:
+            progress(min(start + chunk_size, len(data_frame)), len(data_frame))
+
+
+def text_rows(chunk: DataFrame) -> Iterator[tuple[str, ...]]:
+    """Get rows of the chunk with the index as text values."""
+    columns = [chunk.index.astype(str)]
+    columns.extend(chunk[column].astype(str) for column in chunk.columns)
+    return zip(*columns, strict=True)
+
+
+def write_csv(path: Path | str, chunks: Iterable[DataFrame]) -> None:
+    """Write prediction chunks to a CSV file one by one."""
+    with atomic_write(path, mode="w") as file:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(file, header=i == 0, lineterminator="\n")
+
+
+def write_json_lines(path: Path | str, chunks: Iterable[DataFrame]) -> None:
+    """Write prediction chunks as JSON Lines, one object per row."""
+    with atomic_write(path, mode="w") as file:
+        for chunk in chunks:
+            if len(chunk):
+                file.write(
+                    chunk.to_json(
+                        orient="records",
+                        lines=True,
+                        date_format="iso",
+                        double_precision=15,
+                    ).rstrip("\n"),
+                )
+                file.write("\n")
+
+
+def write_xml(path: Path | str, chunks: Iterable[DataFrame]) -> None:
+    """Write prediction chunks as XML rows in the `DataFrame.to_xml` layout."""
+    with atomic_write(path, mode="w") as file:
+        file.write("<?xml version='1.0' encoding='utf-8'?>\n<data>\n")
+        for chunk in chunks:
+            tags = ["index", *map(str, chunk.columns)]
+            file.writelines(
+                "  <row>\n"
+                + "".join(
+                    f"    <{tag}>{escape_xml(value)}</{tag}>\n"
+                    for tag, value in zip(tags, row, strict=True)
+                )
+                + "  </row>\n"
+                for row in text_rows(chunk)
+            )
+        file.write("</data>\n")
+
+
+def write_html(path: Path | str, chunks: Iterable[DataFrame]) -> None:
+    """Write prediction chunks as rows of one HTML table."""
+    with atomic_write(path, mode="w") as file:
+        file.write('<table border="1" class="dataframe">\n')
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                file.write(
+                    "  <thead>\n"
+                    '    <tr style="text-align: right;">\n'
+                    "      <th></th>\n",
+                )
+                file.writelines(
+                    f"      <th>{escape_html(str(column))}</th>\n"
+                    for column in chunk.columns
+                )
+                file.write("    </tr>\n  </thead>\n  <tbody>\n")
+            file.writelines(
+                f"    <tr>\n      <th>{escape_html(row[0])}</th>\n"
+                + "".join(
+                    f"      <td>{escape_html(value)}</td>\n"
+                    for value in row[1:]
+                )
+                + "    </tr>\n"
+                for row in text_rows(chunk)
+            )
+        file.write("  </tbody>\n</table>\n")
+
+
+def write_xlsx(path: Path | str, chunks: Iterable[DataFrame]) -> None:
+    """Write prediction chunks to an Excel sheet in write-only mode."""
+    with atomic_write(path) as file:
+        # Режим write-only не держит все ячейки листа в памяти
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        try:
+            for i, chunk in enumerate(chunks):
+                if i == 0:
+                    sheet.append([None, *map(str, chunk.columns)])
+                for row in chunk.itertuples(name=None):
+                    sheet.append(row)
+        except BaseException:
+            # Строки уже лежат во временном файле openpyxl, который удаляет
+            # только сохранение. Сохраняем книгу во временный файл
+            # atomic_write, который удалится при выходе по исключению
+            with suppress(Exception):
+                workbook.save(file)
+            raise
+        workbook.save(file)
+
+
+FRAME_WRITERS: dict[str, Callable[[Path | str, Iterable[DataFrame]], None]] = {
+    ".csv": write_csv,
+    ".jsonl": write_json_lines,
+    ".xml": write_xml,
+    ".html": write_html,
+    ".xlsx": write_xlsx,
+}
+
+
+def export_frame(
+    data_frame: DataFrame,
+    path: Path | str,
+    *,
+    progress: Callable[[int, int], None] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
+) -> None:
+    """
+    Export a frame in row chunks, picking the format by the file suffix.
+
+    A cancelled or failed export leaves no file behind.
+    """
+    suffix = Path(path).suffix
+    if suffix not in FRAME_WRITERS:
+        msg = f"Unsupported export format: {suffix}"
+        raise ValueError(msg)
+    with profiled("export_frame"):
+        FRAME_WRITERS[suffix](
+            path,
+            frame_chunks(
+                data_frame,
+                progress=progress,
+                is_cancelled=is_cancelled,
+            ),
+        )
+
+
+def write_npy(
+    path: Path | str,
+    chunks: Iterable[DataFrame],
+    length: int,
+) -> None:
+    """
+    Write prediction chunks to a `.npy` file of structured records.
+
+    The header needs the total number of rows, so it is passed as `length`.
+    The file can be read back with `numpy.load(path, mmap_mode="r")`.
+    """
+    with atomic_write(path) as file:
+        written = 0
+        for i, chunk in enumerate(chunks):
+            records = chunk.to_records(index=False)
+            if i == 0:
+                np.lib.format.write_array_header_1_0(
+                    file,
+                    {
+                        "descr": np.lib.format.dtype_to_descr(records.dtype),
+                        "fortran_order": False,
+                        "shape": (length,),
+                    },
+                )
+            file.write(records.tobytes())
+            written += len(records)
+        if written != length:
+            msg = f"Expected {length} rows, got {written}"
+            raise ValueError(msg)
+
+
+def write_predictions(
+    path: Path | str,
+    chunks: Iterable[DataFrame],
+    length: int,
+) -> None:
+    """Write `length` rows of prediction chunks to a `.csv` or `.npy` file."""
+    match Path(path).suffix:
+        case ".csv":
+            write_csv(path, chunks)
+        case ".npy":
+            write_npy(path, chunks, length)
+        case suffix:
+            msg = f"Unsupported export format: {suffix}"
+            raise ValueError(msg)
+
+
+def export_predictions(
+    company_name: str,
+    start: datetime,
+    end: datetime,
+    path: Path | str,
+) -> None:
+    """Predict energy consumption straight to a `.csv` or `.npy` file."""
+    write_predictions(
+        path,
+        iter_predictions(company_name, start, end),
+        prediction_length(start, end),
+    )
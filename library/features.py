@@ -0,0 +1,161 @@
+"""Calendar feature engine module."""
+
+import numpy as np
+from numpy import cos, float32, int64, ndarray, sin
+from pandas import Series
+
+FEATURE_COLUMNS = (
+    "year",
+    "month",
+    "day",
+    "hour",
+    "dayofweek",
+    "is_weekend",
+    "quarter",
+    "dayofyear",
+    "weekofyear",
+    "day_sin",
+    "day_cos",
+    "hour_sin",
+    "hour_cos",
+    "month_sin",
+    "month_cos",
+)
+INTEGER_FEATURE_COLUMNS = FEATURE_COLUMNS[:9]
+
+HOURS_PER_DAY = 24
+DAYS_PER_WEEK = 7
+# 1 января 1970 года - четверг
+EPOCH_DAY_OF_WEEK = 3
+
+
+def to_hours(timestamps: ndarray | Series) -> ndarray:
+    """Convert timestamps to whole hours since the Unix epoch."""
+    return np.asarray(timestamps, dtype="datetime64[h]").astype(int64)
+
+
+def civil_from_days(days: ndarray) -> tuple[ndarray, ndarray, ndarray]:
+    """Convert days since the Unix epoch to year, month and day."""
+    # Алгоритм Говарда Хиннанта: годы считаются от 1 марта
+    days = days + 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (
+        day_of_era
+        - day_of_era // 1460
+        + day_of_era // 36524
+        - day_of_era // 146096
+    ) // 365
+    day_of_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100
+    )
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = np.where(
+        shifted_month < 10,  # noqa: PLR2004
+        shifted_month + 3,
+        shifted_month - 9,
+    )
+    year = year_of_era + era * 400 + (month <= 2)  # noqa: PLR2004
+    return year, month, day
+
+
+def days_from_civil(year: ndarray, month: ndarray, day: ndarray) -> ndarray:
+    """Convert year, month and day to days since the Unix epoch."""
+    year = year - (month <= 2)  # noqa: PLR2004
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = (
+        year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    )
+    return era * 146097 + day_of_era - 719468
+
+
+def iso_weeks_in_year(year: ndarray) -> ndarray:
+    """Get number of ISO weeks in the year."""
+
+    def december_31_weekday(year: ndarray) -> ndarray:
+        return (year + year // 4 - year // 100 + year // 400) % DAYS_PER_WEEK
+
+    # 53 недели, если год начался или закончился в четверг
+    long_year = (december_31_weekday(year) == 4) | (  # noqa: PLR2004
+        december_31_weekday(year - 1) == 3  # noqa: PLR2004
+    )
+    return 52 + long_year
+
+
+def day_features(days: ndarray) -> ndarray:
+    """Compute features of days since the Unix epoch, hour columns are 0."""
+    year, month, day = civil_from_days(days)
+
+    dayofweek = (days + EPOCH_DAY_OF_WEEK) % DAYS_PER_WEEK  # 0-6 (пн-вс)
+    dayofyear = days - days_from_civil(year, np.ones_like(year), 1) + 1
+
+    # Номер недели по ISO 8601, как в pandas `isocalendar().week`
+    week = (dayofyear - dayofweek + 9) // DAYS_PER_WEEK
+    weekofyear = np.select(
+        [week < 1, week > iso_weeks_in_year(year)],
+        [iso_weeks_in_year(year - 1), 1],
+        week,
+    )
+
+    features = np.zeros((len(days), len(FEATURE_COLUMNS)), dtype=float32)
+    for name, values in (
+        ("year", year),
+        ("month", month),
+        ("day", day),
+        ("dayofweek", dayofweek),
+        ("is_weekend", dayofweek >= 5),  # noqa: PLR2004
+        ("quarter", (month - 1) // 3 + 1),
+        ("dayofyear", dayofyear),
+        ("weekofyear", weekofyear),
+        # Синусы считаем в float64 и только потом округляем
+        ("day_sin", sin(day)),
+        ("day_cos", cos(day)),
+        ("month_sin", sin(month)),
+        ("month_cos", cos(month)),
+    ):
+        features[:, FEATURE_COLUMNS.index(name)] = values
+    return features
+
+
+def hour_features(hour: ndarray) -> ndarray:
+    """Compute features of hours of day, date columns are 0."""
+    features = np.zeros((len(hour), len(FEATURE_COLUMNS)), dtype=float32)
+    for name, values in (
+        ("hour", hour),
+        ("hour_sin", sin(hour)),
+        ("hour_cos", cos(hour)),
+    ):
+        features[:, FEATURE_COLUMNS.index(name)] = values
+    return features
+
+
+HOUR_FEATURES = hour_features(np.arange(HOURS_PER_DAY))
+
+
+def calendar_features(hours: ndarray) -> ndarray:
+    """
+    Compute calendar features of hours since the Unix epoch.
+
+    Returns a C-contiguous float32 matrix with `FEATURE_COLUMNS` columns.
+    Both model training and prediction build features here, so they always
+    match.
+    """
+    hours = np.asarray(hours, dtype=int64)
+    days, hour = np.divmod(hours, HOURS_PER_DAY)
+    if not len(days):
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=float32)
+
+    # Признаки даты общие для всех часов дня: считаем их по дням
+    first_day = days.min()
+    n_days = days.max() - first_day + 1
+    if n_days <= len(days):
+        features = day_features(np.arange(first_day, first_day + n_days))[
+            days - first_day
+        ]
+    else:
+        features = day_features(days)
+    features += HOUR_FEATURES[hour]
+    return features
@@ -0,0 +1,42 @@
+"""File utilities module."""
+
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+DEFAULT_FILE_MODE = 0o644
+
+
+@contextmanager
+def atomic_write(path: Path | str, mode: str = "wb") -> Iterator[IO]:
+    """
+    Open a file for writing that replaces `path` only on success.
+
+    Data goes to a temporary file in the same directory, which is renamed
+    over `path` once the block exits without an exception, so readers never
+    see a partially written file.
+    """
+    path = Path(path)
+    descriptor, temporary_name = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+    )
+    temporary_path = Path(temporary_name)
+    # mkstemp создаёт файл только для владельца - возвращаем обычные права
+    temporary_path.chmod(
+        path.stat().st_mode if path.exists() else DEFAULT_FILE_MODE,
+    )
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with os.fdopen(descriptor, mode, encoding=encoding) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        temporary_path.replace(path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
@@ -1,113 +1,357 @@
 """ML functional module."""
 
 import pickle
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta
 from pathlib import Path
+from time import perf_counter
+from typing import Self
 
-from numpy import cos, ndarray, sin
-from pandas import DataFrame, concat, date_range, read_csv, to_datetime
+from numpy import int32, ndarray, searchsorted
+from pandas import DataFrame, RangeIndex, concat, date_range
 
-from .boosting import GradientBoostingRegressor
+from .boosting import GradientBoostingRegressor, ProgressCallback
+from .features import (
+    FEATURE_COLUMNS,
+    INTEGER_FEATURE_COLUMNS,
+    calendar_features,
+    to_hours,
+)
+from .instrumentation import count, profiled, span
+from .model_file import CompactModel, check_feature_columns
+from .store import load_series
+
+HOURS_PER_WEEK = 7 * 24
+MODELS_DIRECTORY = Path("./data/models/")
+MODEL_FILE_ENDING = "_regressor.gbm"
+LEGACY_MODEL_FILE_ENDING = "_regressor.pkl"
+MODEL_PARAMS = {
+    "n_estimators": 50,
+    "learning_rate": 0.0001,
+    "max_depth": 5,
+}
+# Около 24 недель: память на кусок не зависит от длины интервала,
+# и накладные расходы на кусок уже незаметны
+PREDICTION_CHUNK_SIZE = 4096
+
+
+type Predictor = CompactModel | GradientBoostingRegressor
+
+
+class PredictionCancelledError(Exception):
+    """Prediction was cancelled before completion."""
+
+
+def model_path(company_name: str) -> Path:
+    """Get path to the trained model of the company."""
+    return MODELS_DIRECTORY / f"{company_name}{MODEL_FILE_ENDING}"
+
+
+def legacy_model_path(company_name: str) -> Path:
+    """Get path to the pickled model of the company."""
+    return MODELS_DIRECTORY / f"{company_name}{LEGACY_MODEL_FILE_ENDING}"
+
+
+def existing_model_path(company_name: str) -> Path:
+    """Get path to the saved model, preferring the compact format."""
+    path = model_path(company_name)
+    if path.exists():
+        return path
+    return legacy_model_path(company_name)
+
+
+def _load_training_data(
+    company_name: str,
+) -> tuple[ndarray, ndarray, ndarray]:
+    with span("store.load_series", company=company_name):
+        hours, consumption = load_series(company_name)
+    with span("features.calendar", rows=len(hours)):
+        return hours, calendar_features(hours), consumption
 
 
 def extract_features(company_name: str) -> tuple[ndarray, ndarray]:
     """Extract features for model training."""
-    data_frame = read_csv(f"./data/companies/{company_name}_hourly.csv")
-
-    data_frame["Datetime"] = to_datetime(data_frame["Datetime"])
-    # Извлекаем компоненты даты и времени
-    data_frame["year"] = data_frame["Datetime"].dt.year
-    data_frame["month"] = data_frame["Datetime"].dt.month
-    data_frame["day"] = data_frame["Datetime"].dt.day
-    data_frame["hour"] = data_frame["Datetime"].dt.hour
-
-    # Дополнительные полезные признаки
-    data_frame["dayofweek"] = data_frame[
-        "Datetime"
-    ].dt.dayofweek  # 0-6 (пн-вс)
-    data_frame["is_weekend"] = (
-        data_frame["Datetime"].dt.dayofweek // 5
-    )  # 1 если выходной
-    data_frame["quarter"] = data_frame["Datetime"].dt.quarter
-    data_frame["dayofyear"] = data_frame["Datetime"].dt.dayofyear
-    data_frame["weekofyear"] = data_frame["Datetime"].dt.isocalendar().week
-
-    data_frame["day_sin"] = sin(data_frame["day"])
-    data_frame["day_cos"] = cos(data_frame["day"])
-    data_frame["hour_sin"] = sin(data_frame["hour"])
-    data_frame["hour_cos"] = cos(data_frame["hour"])
-    data_frame["month_sin"] = sin(data_frame["month"])
-    data_frame["month_cos"] = cos(data_frame["month"])
-
-    y = data_frame[f"{company_name}_MW"]
-    del data_frame[f"{company_name}_MW"]
-    del data_frame["Datetime"]
-    return data_frame.to_numpy(), y.to_numpy()
-
-
-def generate_features(start: datetime, end: datetime) -> DataFrame:  # X only!
-    """Create date range."""
-    return DataFrame({"Datetime": date_range(start=start, end=end, freq="1h")})
-
-
-def pickle_model(company_name: str) -> None:
-    """Train model on dataset and pickle it."""
-    x_train, y_train = extract_features(company_name)
-    model = GradientBoostingRegressor(
-        n_estimators=50,
-        learning_rate=0.0001,
-        max_depth=5,
+    _, x, y = _load_training_data(company_name)
+    return x, y
+
+
+def split_validation(
+    hours: ndarray,
+    x: ndarray,
+    y: ndarray,
+    weeks: int,
+) -> tuple[tuple[ndarray, ndarray], tuple[ndarray, ndarray]]:
+    """
+    Split chronologically sorted samples into train and last `weeks`.
+
+    Samples are selected by their `hours`, so gaps in the series do not
+    shift the split. Raises `ValueError` when no samples are left to train.
+    """
+    if not len(hours):
+        msg = "No samples to split"
+        raise ValueError(msg)
+    start = searchsorted(
+        hours,
+        hours[-1] - weeks * HOURS_PER_WEEK,
+        side="right",
+    )
+    if start == 0:
+        msg = f"No samples left to train after {weeks} validation weeks"
+        raise ValueError(msg)
+    return (x[:start], y[:start]), (x[start:], y[start:])
+
+
+def load_legacy_model(company_name: str) -> GradientBoostingRegressor:
+    """Load the pickled model of the company."""
+    with legacy_model_path(company_name).open(mode="rb") as file:
+        return pickle.load(file)
+
+
+def load_predictor(company_name: str) -> Predictor:
+    """Load the model of the company for prediction only."""
+    path = model_path(company_name)
+    with span("model.load", company=company_name):
+        if not path.exists():
+            return load_legacy_model(company_name)
+        model = CompactModel.load(path)
+        check_feature_columns(model, FEATURE_COLUMNS)
+        return model
+
+
+def load_model(company_name: str) -> GradientBoostingRegressor:
+    """Load the trained model of the company."""
+    path = model_path(company_name)
+    if not path.exists():
+        return load_legacy_model(company_name)
+    model = CompactModel.load(path, mmap=False)
+    check_feature_columns(model, FEATURE_COLUMNS)
+    return model.to_regressor()
+
+
+def save_model(company_name: str, model: GradientBoostingRegressor) -> None:
+    """Save the trained model of the company in the compact format."""
+    CompactModel.from_regressor(model, FEATURE_COLUMNS).save(
+        model_path(company_name),
     )
-    model.train(x_train, y_train)
-    with Path(f"./data/models/{company_name}_regressor.pkl").open(
-        mode="wb",
-    ) as file:
-        pickle.dump(model, file)
+
+
+def train_model(
+    company_name: str,
+    warm_start_estimators: int = 0,
+    validation_weeks: int = 0,
+    patience: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> None:
+    """
+    Train model on dataset and save it.
+
+    If `warm_start_estimators` is positive, the saved model is loaded and
+    only that many new trees are fitted on the current dataset.
+
+    If `validation_weeks` is positive, the last weeks of the series are held
+    out for validation and training stops early after `patience` trees
+    without improvement. `progress` is passed to the model training.
+    """
+    with profiled("train_model"):
+        _train_model(
+            company_name,
+            warm_start_estimators,
+            validation_weeks,
+            patience,
+            progress,
+        )
+
+
+def _train_model(
+    company_name: str,
+    warm_start_estimators: int,
+    validation_weeks: int,
+    patience: int | None,
+    progress: ProgressCallback | None,
+) -> None:
+    hours, x_train, y_train = _load_training_data(company_name)
+    validation = None
+    if validation_weeks > 0:
+        (x_train, y_train), validation = split_validation(
+            hours,
+            x_train,
+            y_train,
+            validation_weeks,
+        )
+    if warm_start_estimators > 0:
+        model = load_model(company_name)
+        model.n_estimators = len(model.trees) + warm_start_estimators
+        model.patience = patience
+        model.train(
+            x_train,
+            y_train,
+            warm_start=True,
+            validation=validation,
+            progress=progress,
+        )
+    else:
+        model = GradientBoostingRegressor(**MODEL_PARAMS, patience=patience)
+        model.train(
+            x_train,
+            y_train,
+            validation=validation,
+            progress=progress,
+        )
+    save_model(company_name, model)
+
+
+class ModelRegistry:
+    """
+    In-process cache of loaded models.
+
+    Keeps up to `max_size` recently used models and reloads a model when
+    its file changes on disk. Hit, miss and load time counters show how
+    well the cache works.
+    """
+
+    def __init__(self: Self, max_size: int = 12) -> None:
+        """Construct model registry."""
+        self.max_size = max_size
+        self._models: OrderedDict[str, tuple[int, Predictor]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    def get(self: Self, company_name: str) -> Predictor:
+        """Get the model of the company, loading it if needed."""
+        mtime = existing_model_path(company_name).stat().st_mtime_ns
+        with self._lock:
+            cached = self._models.get(company_name)
+            if cached is not None and cached[0] == mtime:
+                self._models.move_to_end(company_name)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        # Загружаем без блокировки, чтобы не задерживать другие модели
+        start = perf_counter()
+        model = load_predictor(company_name)
+        elapsed = perf_counter() - start
+
+        with self._lock:
+            self.load_time += elapsed
+            self._models[company_name] = (mtime, model)
+            self._models.move_to_end(company_name)
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+        return model
+
+    def preload(self: Self) -> None:
+        """Load all saved models, as many as fit into the cache."""
+        company_names = sorted(
+            {
+                path.name.removesuffix(ending)
+                for ending in (MODEL_FILE_ENDING, LEGACY_MODEL_FILE_ENDING)
+                for path in MODELS_DIRECTORY.glob(f"*{ending}")
+            },
+        )
+        for company_name in company_names[: self.max_size]:
+            self.get(company_name)
+
+    def preload_in_background(self: Self) -> threading.Thread:
+        """Start loading all saved models on a background thread."""
+        thread = threading.Thread(
+            target=self.preload,
+            name="model-preload",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def stats(self: Self) -> dict[str, float]:
+        """Get cache counters."""
+        with self._lock:
+            return {
+                "size": len(self._models),
+                "hits": self.hits,
+                "misses": self.misses,
+                "load_time": self.load_time,
+            }
+
+    def clear(self: Self) -> None:
+        """Forget all loaded models."""
+        with self._lock:
+            self._models.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def prediction_length(start: datetime, end: datetime) -> int:
+    """Get number of hourly predictions between `start` and `end`."""
+    return max((end - start) // timedelta(hours=1) + 1, 0)
+
+
+def iter_predictions(
+    company_name: str,
+    start: datetime,
+    end: datetime,
+    chunk_size: int = PREDICTION_CHUNK_SIZE,
+) -> Iterator[DataFrame]:
+    """
+    Predict energy consumption in chunks of `chunk_size` hours.
+
+    Chunks have the columns of `model_predict` result and a continuous
+    index. An empty interval yields a single empty chunk.
+    """
+    model = model_registry.get(company_name)
+    length = prediction_length(start, end)
+    for chunk_start in range(0, max(length, 1), chunk_size):
+        index = RangeIndex(chunk_start, min(chunk_start + chunk_size, length))
+        timestamps = date_range(
+            start=start + timedelta(hours=chunk_start),
+            periods=len(index),
+            freq="1h",
+        )
+        with span("predict.chunk", rows=len(index)):
+            with span("features.calendar", rows=len(index)):
+                x = calendar_features(to_hours(timestamps))
+            with span("predict.trees", rows=len(index)):
+                y = model.predict(x)
+        count("predict.rows", len(index))
+        # Один словарь столбцов вместо concat и astype по кускам
+        columns = {"Datetime": timestamps}
+        for i, column in enumerate(FEATURE_COLUMNS):
+            columns[column] = (
+                x[:, i].astype(int32)
+                if column in INTEGER_FEATURE_COLUMNS
+                else x[:, i]
+            )
+        columns[f"{company_name}_MW"] = y
+        yield DataFrame(columns, index=index)
 
 
 def model_predict(
     company_name: str,
     start: datetime,
     end: datetime,
+    *,
+    progress: Callable[[int, int], None] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
 ) -> DataFrame:
-    """Predict energy consumption."""
-    data_frame = generate_features(start, end)
-    data_frame["Datetime"] = to_datetime(data_frame["Datetime"])
-
-    # Извлекаем компоненты даты и времени
-    data_frame["year"] = data_frame["Datetime"].dt.year
-    data_frame["month"] = data_frame["Datetime"].dt.month
-    data_frame["day"] = data_frame["Datetime"].dt.day
-    data_frame["hour"] = data_frame["Datetime"].dt.hour
-
-    # Дополнительные полезные признаки
-    data_frame["dayofweek"] = data_frame[
-        "Datetime"
-    ].dt.dayofweek  # 0-6 (пн-вс)
-    data_frame["is_weekend"] = (
-        data_frame["Datetime"].dt.dayofweek >= 5
-    )  # 1 если выходной
-    data_frame["quarter"] = data_frame["Datetime"].dt.quarter
-    data_frame["dayofyear"] = data_frame["Datetime"].dt.dayofyear
-    data_frame["weekofyear"] = data_frame["Datetime"].dt.isocalendar().week
-
-    data_frame["day_sin"] = sin(data_frame["day"])
-    data_frame["day_cos"] = cos(data_frame["day"])
-
-    data_frame["hour_sin"] = sin(data_frame["hour"])
-    data_frame["hour_cos"] = cos(data_frame["hour"])
-
-    data_frame["month_sin"] = sin(data_frame["month"])
-    data_frame["month_cos"] = cos(data_frame["month"])
-
-    saved = data_frame["Datetime"]
-    del data_frame["Datetime"]
-
-    x = data_frame.to_numpy()
-    model = 0
-    with Path(f"./data/models/{company_name}_regressor.pkl").open(
-        mode="rb",
-    ) as file:
-        model = pickle.load(file)
-    pred = DataFrame({f"{company_name}_MW": model.predict(x)})
-    return concat([saved, data_frame, pred], axis=1)
+    """
+    Predict energy consumption.
+
+    `progress` gets the number of done and total rows after each chunk of
+    `iter_predictions`, and a true `is_cancelled` result raises
+    `PredictionCancelledError`.
+    """
+    length = prediction_length(start, end)
+    chunks = []
+    with profiled("model_predict"):
+        for chunk in iter_predictions(company_name, start, end):
+            chunks.append(chunk)
+            if progress is not None:
+                progress(chunk.index.stop, length)
+            if is_cancelled is not None and is_cancelled():
+                msg = f"Prediction for {company_name} was cancelled"
+                raise PredictionCancelledError(msg)
+        return concat(chunks)
@@ -0,0 +1,189 @@
+"""
+Timing instrumentation module.
+
+Spans and counters are always recorded into the module-level `tracer`.
+Environment variables turn on the heavier tools:
+
+- `ENERGY_TRACE`: path of a Chrome trace written at exit,
+- `ENERGY_PROFILE`: comma-separated `cprofile` and `tracemalloc`, which
+  `profiled` blocks then write to `ENERGY_PROFILE_DIR`.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import threading
+import tracemalloc
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Self
+
+from .files import atomic_write
+
+TRACE_VARIABLE = "ENERGY_TRACE"
+PROFILE_VARIABLE = "ENERGY_PROFILE"
+PROFILE_DIRECTORY_VARIABLE = "ENERGY_PROFILE_DIR"
+DEFAULT_PROFILE_DIRECTORY = Path("./data/profiles/")
+MAX_SPANS = 100_000
+TRACEMALLOC_TOP = 25
+
+
+@dataclass
+class Span:
+    """Finished timing span, times in nanoseconds of `perf_counter_ns`."""
+
+    name: str
+    start: int
+    duration: int
+    thread: int
+    attributes: dict[str, object] = field(default_factory=dict)
+
+
+class Tracer:
+    """Thread-safe collector of spans and counters."""
+
+    def __init__(self: Self, max_spans: int = MAX_SPANS) -> None:
+        """Construct tracer keeping up to `max_spans` latest spans."""
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        self.counters: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self: Self, name: str, **attributes: object) -> Iterator[dict]:
+        """
+        Time a block of code.
+
+        The yielded dict can be filled with attributes known only inside.
+        """
+        start = perf_counter_ns()
+        try:
+            yield attributes
+        finally:
+            span = Span(
+                name,
+                start,
+                perf_counter_ns() - start,
+                threading.get_ident(),
+                attributes,
+            )
+            with self._lock:
+                self.spans.append(span)
+
+    def count(self: Self, name: str, value: int = 1) -> None:
+        """Increase a counter."""
+        with self._lock:
+            self.counters[name] += value
+
+    def clear(self: Self) -> None:
+        """Forget recorded spans and counters."""
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def to_json(self: Self) -> dict[str, object]:
+        """Get spans and counters as plain data."""
+        with self._lock:
+            return {
+                "spans": [asdict(span) for span in self.spans],
+                "counters": dict(self.counters),
+            }
+
+    def to_chrome_trace(self: Self) -> dict[str, object]:
+        """Get spans as complete events of the Chrome trace format."""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.start / 1000,
+                    "dur": span.duration / 1000,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": span.attributes,
+                }
+                for span in self.spans
+            ]
+            counters = dict(self.counters)
+        return {"traceEvents": events, "otherData": {"counters": counters}}
+
+    def export_json(self: Self, path: Path | str) -> None:
+        """Write spans and counters to a JSON file."""
+        with atomic_write(path, mode="w") as file:
+            json.dump(self.to_json(), file, default=str)
+
+    def export_chrome_trace(self: Self, path: Path | str) -> None:
+        """Write spans to a file for `chrome://tracing` or Perfetto."""
+        with atomic_write(path, mode="w") as file:
+            json.dump(self.to_chrome_trace(), file, default=str)
+
+
+tracer = Tracer()
+span = tracer.span
+count = tracer.count
+
+
+def profile_modes() -> set[str]:
+    """Get profilers enabled by the environment variable."""
+    value = os.environ.get(PROFILE_VARIABLE, "")
+    return {mode.strip() for mode in value.split(",") if mode.strip()}
+
+
+@contextmanager
+def profiled(name: str) -> Iterator[None]:
+    """
+    Time an entry point and profile it if enabled by `ENERGY_PROFILE`.
+
+    cProfile stats are saved as `.prof` files, tracemalloc top allocations
+    as `.txt` files.
+    """
+    modes = profile_modes()
+    if not modes:
+        with span(name):
+            yield
+        return
+
+    directory = Path(
+        os.environ.get(PROFILE_DIRECTORY_VARIABLE, DEFAULT_PROFILE_DIRECTORY),
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"{name}-{datetime.now(tz=UTC):%Y%m%dT%H%M%S%f}"
+    with ExitStack() as stack, span(name) as attributes:
+        if "tracemalloc" in modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            stack.callback(tracemalloc.stop)
+            stack.callback(
+                write_tracemalloc,
+                directory / f"{stem}.txt",
+                attributes,
+            )
+        if "cprofile" in modes:
+            profiler = cProfile.Profile()
+            stack.callback(profiler.dump_stats, directory / f"{stem}.prof")
+            stack.callback(profiler.disable)
+            profiler.enable()
+        yield
+
+
+def write_tracemalloc(path: Path, attributes: dict[str, object]) -> None:
+    """Save top allocations and record peak traced memory in the span."""
+    attributes["peak_memory"] = tracemalloc.get_traced_memory()[1]
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    with atomic_write(path, mode="w") as file:
+        file.writelines(f"{stat}\n" for stat in statistics[:TRACEMALLOC_TOP])
+
+
+def export_trace_at_exit() -> None:
+    """Write the Chrome trace to the path from `ENERGY_TRACE`, if set."""
+    path = os.environ.get(TRACE_VARIABLE)
+    if path:
+        tracer.export_chrome_trace(path)
+
+
+atexit.register(export_trace_at_exit)
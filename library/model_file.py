@@ -0,0 +1,287 @@
+"""Compact model file module."""
+
+import json
+from itertools import pairwise
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+from numpy import float64, full, int64, ndarray
+
+from .boosting import (
+    TREE_LEAF,
+    DecisionTreeRegressor,
+    GradientBoostingRegressor,
+    apply_tree,
+    as_float_array,
+)
+from .files import atomic_write
+
+MAGIC = b"GBRMODEL"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# Магическая строка, версия формата и длина заголовка
+PREAMBLE = np.dtype([("magic", "S8"), ("version", "<u4"), ("length", "<u4")])
+ARRAY_DTYPES = {
+    "tree_offsets": np.dtype("<i8"),
+    "feature": np.dtype("<i4"),
+    "threshold": np.dtype("<f8"),
+    "left": np.dtype("<i4"),
+    "right": np.dtype("<i4"),
+    "value": np.dtype("<f8"),
+}
+
+
+class ModelFileError(ValueError):
+    """Model file is damaged or has unsupported format."""
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class CompactModel:
+    """
+    Gradient boosting ensemble stored as flat numeric arrays.
+
+    Nodes of all trees are concatenated, and `tree_offsets` marks where
+    each tree starts. Child indices are local to their tree. Predicting
+    needs no Python objects per tree or node, so the arrays may be
+    memory-mapped straight from a model file.
+    """
+
+    def __init__(
+        self: Self,
+        metadata: dict,
+        arrays: dict[str, ndarray],
+    ) -> None:
+        """Construct compact model from metadata and node arrays."""
+        self.learning_rate = metadata["learning_rate"]
+        self.initial_prediction = metadata["initial_prediction"]
+        self.feature_columns = tuple(metadata["feature_columns"])
+        self.params = metadata["params"]
+        self.tree_offsets = arrays["tree_offsets"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+
+    @property
+    def n_trees(self: Self) -> int:
+        """Number of trees in the ensemble."""
+        return len(self.tree_offsets) - 1
+
+    @classmethod
+    def from_regressor(
+        cls: type[Self],
+        model: GradientBoostingRegressor,
+        feature_columns: tuple[str, ...],
+    ) -> Self:
+        """Flatten a trained gradient boosting regressor."""
+        sizes = [tree.node_count for tree in model.trees]
+        arrays = {
+            "tree_offsets": np.concatenate(([0], np.cumsum(sizes))),
+            **{
+                name: np.concatenate(
+                    [getattr(tree, name) for tree in model.trees]
+                    or [np.empty(0)],
+                )
+                for name in ("feature", "threshold", "left", "right", "value")
+            },
+        }
+        metadata = {
+            "learning_rate": float(model.learning_rate),
+            "initial_prediction": float(model.initial_prediction),
+            "feature_columns": list(feature_columns),
+            "params": model.get_params(),
+        }
+        return cls(
+            metadata,
+            {
+                name: array.astype(ARRAY_DTYPES[name])
+                for name, array in arrays.items()
+            },
+        )
+
+    def to_regressor(self: Self) -> GradientBoostingRegressor:
+        """Rebuild a gradient boosting regressor, e.g. to train it further."""
+        model = GradientBoostingRegressor(**self.params)
+        model.initial_prediction = self.initial_prediction
+        for start, stop in pairwise(self.tree_offsets):
+            tree = DecisionTreeRegressor(
+                max_depth=model.max_depth,
+                splitter=model.splitter,
+                max_bins=model.max_bins,
+                n_jobs=model.n_jobs,
+            )
+            tree.feature = self.feature[start:stop].astype(np.intp)
+            tree.threshold = self.threshold[start:stop].astype(float64)
+            tree.left = self.left[start:stop].astype(np.intp)
+            tree.right = self.right[start:stop].astype(np.intp)
+            tree.value = self.value[start:stop].astype(float64)
+            model.trees.append(tree)
+        return model
+
+    def predict(self: Self, x: ndarray) -> ndarray:
+        """Predict energy consumption."""
+        x = as_float_array(x)
+        y_pred = full(x.shape[0], self.initial_prediction, dtype=float64)
+        for start, stop in pairwise(self.tree_offsets):
+            leaves = apply_tree(
+                x,
+                self.feature[start:stop],
+                self.threshold[start:stop],
+                self.left[start:stop],
+                self.right[start:stop],
+            )
+            y_pred += self.learning_rate * self.value[start:stop][leaves]
+        return y_pred
+
+    def save(self: Self, path: Path | str) -> None:
+        """Write the model file atomically."""
+        arrays = {
+            "tree_offsets": self.tree_offsets,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+        }
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = {"offset": offset, "shape": list(array.shape)}
+            offset = _aligned(offset + array.nbytes)
+
+        header = json.dumps(
+            {
+                "learning_rate": self.learning_rate,
+                "initial_prediction": self.initial_prediction,
+                "feature_columns": list(self.feature_columns),
+                "params": self.params,
+                "arrays": layout,
+            },
+        ).encode()
+        # Данные массивов выравниваются для чтения через memmap
+        data_start = _aligned(PREAMBLE.itemsize + len(header))
+        header = header.ljust(data_start - PREAMBLE.itemsize)
+        preamble = np.array(
+            (MAGIC, FORMAT_VERSION, len(header)),
+            dtype=PREAMBLE,
+        )
+
+        with atomic_write(path) as file:
+            file.write(preamble.tobytes())
+            file.write(header)
+            for name, array in arrays.items():
+                file.seek(data_start + layout[name]["offset"])
+                file.write(
+                    np.ascontiguousarray(
+                        array,
+                        dtype=ARRAY_DTYPES[name],
+                    ).tobytes(),
+                )
+
+    @classmethod
+    def load(cls: type[Self], path: Path | str, *, mmap: bool = True) -> Self:
+        """
+        Read a model file.
+
+        With `mmap` the node arrays are read-only views of the memory-mapped
+        file. Loading never executes code stored in the file.
+        """
+        # Обычный ndarray поверх memmap: срезы memmap заметно медленнее
+        buffer = (
+            np.memmap(path, mode="r").view(ndarray)
+            if mmap
+            else np.fromfile(path, dtype=np.uint8)
+        )
+        if len(buffer) < PREAMBLE.itemsize:
+            msg = f"{path}: file is too short"
+            raise ModelFileError(msg)
+        preamble = buffer[: PREAMBLE.itemsize].view(PREAMBLE)[0]
+        if preamble["magic"] != MAGIC:
+            msg = f"{path}: not a model file"
+            raise ModelFileError(msg)
+        if preamble["version"] != FORMAT_VERSION:
+            msg = f"{path}: unsupported format version {preamble['version']}"
+            raise ModelFileError(msg)
+
+        data_start = PREAMBLE.itemsize + int(preamble["length"])
+        try:
+            metadata = json.loads(
+                buffer[PREAMBLE.itemsize : data_start].tobytes(),
+            )
+            arrays = {}
+            for name, dtype in ARRAY_DTYPES.items():
+                location = metadata["arrays"][name]
+                start = data_start + location["offset"]
+                count = int(np.prod(location["shape"], dtype=int64))
+                stop = start + count * dtype.itemsize
+                if stop > len(buffer):
+                    msg = f"{path}: array {name} is truncated"
+                    raise ModelFileError(msg)
+                arrays[name] = (
+                    buffer[start:stop].view(dtype).reshape(location["shape"])
+                )
+            model = cls(metadata, arrays)
+        except (KeyError, TypeError, json.JSONDecodeError) as error:
+            msg = f"{path}: damaged header"
+            raise ModelFileError(msg) from error
+        model.check_nodes(path)
+        return model
+
+    def check_nodes(self: Self, path: Path | str) -> None:
+        """
+        Check that node arrays form valid trees.
+
+        Children of a split must come after it and stay inside its tree, so
+        prediction always reaches a leaf.
+        """
+        n_nodes = len(self.feature)
+        offsets = self.tree_offsets
+        if any(
+            getattr(self, name).shape != (n_nodes,)
+            for name in ("threshold", "left", "right", "value")
+        ):
+            msg = f"{path}: node arrays have different lengths"
+            raise ModelFileError(msg)
+        # Каждое дерево содержит хотя бы корень
+        if (
+            offsets.ndim != 1
+            or len(offsets) == 0
+            or offsets[0] != 0
+            or offsets[-1] != n_nodes
+            or (np.diff(offsets) <= 0).any()
+        ):
+            msg = f"{path}: damaged tree offsets"
+            raise ModelFileError(msg)
+
+        sizes = np.diff(offsets)
+        # Индексы детей локальны для дерева
+        node_idx = np.arange(n_nodes) - np.repeat(offsets[:-1], sizes)
+        tree_size = np.repeat(sizes, sizes)
+        is_split = self.feature != TREE_LEAF
+        feature = self.feature[is_split]
+        node_idx, tree_size = node_idx[is_split], tree_size[is_split]
+        if (feature < 0).any() or (feature >= len(self.feature_columns)).any():
+            msg = f"{path}: split feature out of range"
+            raise ModelFileError(msg)
+        for children in (self.left[is_split], self.right[is_split]):
+            if ((children <= node_idx) | (children >= tree_size)).any():
+                msg = f"{path}: child node out of order or out of its tree"
+                raise ModelFileError(msg)
+
+
+def check_feature_columns(
+    model: CompactModel,
+    feature_columns: tuple[str, ...],
+) -> None:
+    """Check that the model was trained on the given feature schema."""
+    if model.feature_columns != feature_columns:
+        msg = (
+            f"Model expects features {model.feature_columns}, "
+            f"got {feature_columns}"
+        )
+        raise ModelFileError(msg)
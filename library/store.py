@@ -0,0 +1,98 @@
+"""Hourly consumption data store module."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+from numpy import float32, int64, ndarray
+from pandas import read_csv
+
+from .files import atomic_write
+from .instrumentation import span
+
+CACHE_DIRECTORY = Path("./data/cache/")
+CACHE_VERSION = 1
+
+
+def company_data_path(company_name: str) -> Path:
+    """Get path to hourly consumption data of the company."""
+    return Path(f"./data/companies/{company_name}_hourly.csv")
+
+
+def _cache_paths(company_name: str) -> tuple[Path, Path, Path]:
+    """Get paths to cached hours, consumption and cache metadata."""
+    return (
+        CACHE_DIRECTORY / f"{company_name}_hours.npy",
+        CACHE_DIRECTORY / f"{company_name}_mw.npy",
+        CACHE_DIRECTORY / f"{company_name}_meta.json",
+    )
+
+
+def _source_metadata(company_name: str) -> dict[str, int]:
+    """Describe the CSV file the cache is built from."""
+    stat = company_data_path(company_name).stat()
+    return {
+        "version": CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _is_cache_valid(company_name: str) -> bool:
+    """Check that the cache exists and was built from the current CSV."""
+    hours_path, consumption_path, metadata_path = _cache_paths(company_name)
+    try:
+        with metadata_path.open(mode="r") as file:
+            metadata = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return (
+        hours_path.exists()
+        and consumption_path.exists()
+        and metadata == _source_metadata(company_name)
+    )
+
+
+def build_cache(company_name: str) -> None:
+    """Convert the company CSV into binary cache files."""
+    metadata = _source_metadata(company_name)
+    with span("store.parse_csv", company=company_name):
+        data_frame = read_csv(
+            company_data_path(company_name),
+            parse_dates=["Datetime"],
+            date_format="%Y-%m-%d %H:%M:%S",
+        )
+    hours = (
+        data_frame["Datetime"].to_numpy().astype("datetime64[h]").astype(int64)
+    )
+    consumption = data_frame[f"{company_name}_MW"].to_numpy(dtype=float32)
+
+    # Строки в файлах не упорядочены - храним по времени
+    order = np.argsort(hours, kind="stable")
+
+    CACHE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    hours_path, consumption_path, metadata_path = _cache_paths(company_name)
+    with atomic_write(hours_path) as file:
+        np.save(file, hours[order])
+    with atomic_write(consumption_path) as file:
+        np.save(file, consumption[order])
+    # Метаданные пишутся последними: без них кэш считается устаревшим
+    with atomic_write(metadata_path, mode="w") as file:
+        json.dump(metadata, file)
+
+
+def load_series(company_name: str) -> tuple[ndarray, ndarray]:
+    """
+    Load hourly consumption of the company sorted by time.
+
+    Returns read-only memory-mapped arrays of hours since the Unix epoch
+    (int64) and consumption in MW (float32). The CSV is parsed only when
+    the cache is missing or the file changed since it was built.
+    """
+    if not _is_cache_valid(company_name):
+        build_cache(company_name)
+    hours_path, consumption_path, _ = _cache_paths(company_name)
+    return (
+        np.load(hours_path, mmap_mode="r"),
+        np.load(consumption_path, mmap_mode="r"),
+    )
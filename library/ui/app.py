@@ -1,36 +1,49 @@
 """Main UI module."""
 
+import threading
 from datetime import date, datetime, time
 from pathlib import Path
-from typing import Self, override
+from typing import TYPE_CHECKING, Self, override
 
-from PySide6.QtCore import QDate, QTime
+from PySide6.QtCore import QDate, QThreadPool, QTime, Signal
+from PySide6.QtGui import QPaintEvent
 from PySide6.QtWidgets import (
     QComboBox,
+    QMessageBox,
+    QProgressBar,
     QPushButton,
     QWidget,
 )
 
-from library.functional import model_predict
 from library.ui.date_selector import DateSelector
 from library.ui.layout import Layout
-from library.ui.prediction import PredictionDialog
-from library.ui.settings import Settings
 from library.ui.time_selector import TimeSelector
 
+# pandas, matplotlib и модели импортируются только при первом использовании,
+# чтобы окно появлялось сразу после загрузки PySide6
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from library.ui.worker import PredictionRequest, Worker
+
 
 class App(QWidget):
-    """Main widget."""
+    """
+    Main widget.
+
+    Emits `first_painted` once the window is drawn for the first time.
+    """
+
+    first_painted = Signal()
 
     @override
     def __init__(self: Self) -> None:
         super().__init__()
         self.setWindowTitle("Energy consumption time series")
+        self.painted = False
 
         self.settings_button = QPushButton("Настройки")
-        self.settings_button.clicked.connect(
-            lambda: Settings(parent=self).exec(),
-        )
+        self.settings_button.clicked.connect(self.show_settings)
 
         self.start_date = DateSelector(self.check_datetime_validity)
         self.end_date = DateSelector(self.check_datetime_validity)
@@ -43,6 +56,20 @@ class App(QWidget):
         self.predict_button = QPushButton("Предсказать потребление")
         self.predict_button.clicked.connect(self.show_predict_result)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+
+        self.cancel_button = QPushButton("Отменить")
+        self.cancel_button.setVisible(False)
+        self.cancel_button.clicked.connect(self.cancel_prediction)
+
+        # Один поток: задачи предсказания не выполняются одновременно
+        self.thread_pool = QThreadPool(parent=self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.worker: Worker | None = None
+        self.running_request: PredictionRequest | None = None
+        self.pending_request: PredictionRequest | None = None
+
         self.setLayout(
             Layout(
                 settings_button=self.settings_button,
@@ -52,11 +79,42 @@ class App(QWidget):
                 end_time=self.end_time,
                 companies=self.companies,
                 predict_button=self.predict_button,
+                progress_bar=self.progress_bar,
+                cancel_button=self.cancel_button,
             ),
         )
 
         self.check_datetime_validity()
 
+    @override
+    def paintEvent(self: Self, event: QPaintEvent) -> None:
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
+
+    @staticmethod
+    def warm_up() -> None:
+        """Import model and export code and load models ahead of first use."""
+        # Только модули без Qt: объекты Qt принадлежат потоку, где созданы.
+        # matplotlib и диалоги импортируются при первом показе результата
+        from library import export  # noqa: F401, PLC0415
+        from library.functional import model_registry  # noqa: PLC0415
+
+        model_registry.preload()
+
+    def warm_up_in_background(self: Self) -> threading.Thread:
+        """Run `warm_up` in a daemon thread."""
+        thread = threading.Thread(target=self.warm_up, daemon=True)
+        thread.start()
+        return thread
+
+    def show_settings(self: Self) -> None:
+        """Show settings dialog."""
+        from library.ui.settings import Settings  # noqa: PLC0415
+
+        Settings(parent=self).exec()
+
     @staticmethod
     def get_companies() -> QComboBox:
         """Generate menu of companies."""
@@ -111,11 +169,82 @@ class App(QWidget):
             self.predict_button.setEnabled(True)
             self.predict_button.setToolTip("")
 
-    def show_predict_result(self) -> None:
-        """Show predict result."""
-        data_frame = model_predict(
-            self.companies.currentText(),
-            self.get_start_datetime(),
-            self.get_end_datetime(),
+    def show_predict_result(self: Self) -> None:
+        """Start prediction in background or coalesce with the running one."""
+        from library.ui.worker import PredictionRequest  # noqa: PLC0415
+
+        request = PredictionRequest(
+            company_name=self.companies.currentText(),
+            start=self.get_start_datetime(),
+            end=self.get_end_datetime(),
         )
-        PredictionDialog(parent=self, data_frame=data_frame).exec()
+        if self.worker is None:
+            self.start_prediction(request)
+        elif (
+            request == self.running_request and not self.worker.is_cancelled()
+        ):
+            # Повторное нажатие для уже выполняемой задачи ничего не делает
+            self.pending_request = None
+        else:
+            # Хранится только последний запрос, остальные отбрасываются
+            self.pending_request = request
+            self.worker.cancel()
+
+    def start_prediction(self: Self, request: "PredictionRequest") -> None:
+        """Run prediction worker in the thread pool."""
+        from library.ui.worker import prediction_worker  # noqa: PLC0415
+
+        self.worker = prediction_worker(request)
+        self.running_request = request
+        self.worker.setAutoDelete(False)
+        self.worker.signals.progress.connect(self.show_progress)
+        self.worker.signals.finished.connect(self.prediction_finished)
+        self.worker.signals.failed.connect(self.prediction_failed)
+        self.worker.signals.cancelled.connect(self.prediction_cancelled)
+
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.cancel_button.setVisible(True)
+        self.thread_pool.start(self.worker)
+
+    def cancel_prediction(self: Self) -> None:
+        """Cancel running prediction."""
+        self.pending_request = None
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def show_progress(self: Self, done: int, total: int) -> None:
+        """Show prediction progress in rows."""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def finish_prediction(self: Self) -> bool:
+        """
+        Release finished worker and start the pending request.
+
+        Returns whether a pending request was started.
+        """
+        self.worker = self.running_request = None
+        self.progress_bar.setVisible(False)
+        self.cancel_button.setVisible(False)
+        if self.pending_request is None:
+            return False
+        request, self.pending_request = self.pending_request, None
+        self.start_prediction(request)
+        return True
+
+    def prediction_finished(self: Self, data_frame: "DataFrame") -> None:
+        """Show prediction result unless a newer request is pending."""
+        from library.ui.prediction import PredictionDialog  # noqa: PLC0415
+
+        if not self.finish_prediction():
+            PredictionDialog(parent=self, data_frame=data_frame).exec()
+
+    def prediction_failed(self: Self, message: str) -> None:
+        """Show prediction error."""
+        if not self.finish_prediction():
+            QMessageBox.critical(self, "Ошибка предсказания", message)
+
+    def prediction_cancelled(self: Self) -> None:
+        """Clean up after cancelled prediction."""
+        self.finish_prediction()
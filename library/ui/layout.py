@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
     QComboBox,
     QHBoxLayout,
     QLabel,
+    QProgressBar,
     QPushButton,
     QVBoxLayout,
 )
@@ -27,6 +28,8 @@ class Layout(QVBoxLayout):
         end_time: TimeSelector,
         companies: QComboBox,
         predict_button: QPushButton,
+        progress_bar: QProgressBar,
+        cancel_button: QPushButton,
     ) -> None:
         super().__init__()
 
@@ -57,3 +60,8 @@ class Layout(QVBoxLayout):
         self.addLayout(end_time_layout)
         self.addLayout(city_layout)
         self.addWidget(predict_button)
+
+        progress_layout = QHBoxLayout()
+        progress_layout.addWidget(progress_bar)
+        progress_layout.addWidget(cancel_button)
+        self.addLayout(progress_layout)
@@ -2,10 +2,16 @@
 
 from typing import Self, override
 
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import Event
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.dates import date2num
+from matplotlib.figure import Figure
+from numpy import ndarray
 from pandas import DataFrame
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QCloseEvent
 from PySide6.QtWidgets import (
     QDialog,
     QFileDialog,
@@ -14,11 +20,47 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from library.ui.settings import Settings
+from library.instrumentation import span
+from library.ui.settings import Settings, settings_store
+
+# Нижняя граница числа кусков, пока холст ещё не получил размер
+MIN_PLOT_BUCKETS = 100
+
+
+def min_max_indices(y: ndarray, n_buckets: int) -> ndarray:
+    """
+    Get sorted indices of points keeping the shape of a dense series.
+
+    The series is split into `n_buckets` equal runs, and the first, last,
+    minimal and maximal points of every run are kept.
+    """
+    if len(y) <= 4 * n_buckets:
+        return np.arange(len(y))
+    width = -(-len(y) // n_buckets)
+    # Повтор последнего значения не меняет минимум и максимум куска
+    runs = np.pad(y, (0, width * n_buckets - len(y)), mode="edge").reshape(
+        n_buckets,
+        width,
+    )
+    starts = np.arange(n_buckets) * width
+    indices = np.concatenate(
+        [
+            starts,
+            starts + runs.argmin(axis=1),
+            starts + runs.argmax(axis=1),
+            starts + width - 1,
+        ],
+    )
+    return np.unique(np.minimum(indices, len(y) - 1))
 
 
 class Plot(QDialog):
-    """Plot dialog."""
+    """
+    Plot dialog.
+
+    Datetime plots show the raw series downsampled to the canvas width and
+    re-downsampled on zoom, other plots show means per value of `x_column`.
+    """
 
     @override
     def __init__(
@@ -29,27 +71,35 @@ class Plot(QDialog):
         y_column: str,
     ) -> None:
         super().__init__(parent, Qt.WindowType.Window)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
 
         self.setWindowTitle("График зависимости")
 
-        self.figure, self.ax = plt.subplots()
+        # Фигура вне pyplot: её не держит глобальный менеджер фигур
+        self.figure = Figure()
+        self.ax: Axes = self.figure.add_subplot()
         self.canvas = FigureCanvas(figure=self.figure)
+        self.resize_callback: int | None = None
+        # Маркеры на огибающей минимумов и максимумов только мешают
+        self.show_markers = data_frame[x_column].dtype.kind != "M"
 
-        median_series = data_frame.groupby(x_column)[y_column].mean()
-
-        self.ax.plot(
-            median_series.index,
-            median_series.to_numpy(),
-            marker=Settings.plot_marker(),
-            linestyle=Settings.plot_linestyle(),
-            color=Settings.plot_color(),
-        )
-        self.ax.set_xlabel(xlabel=x_column)
-        self.ax.set_ylabel(ylabel=y_column)
-        self.ax.set_title(label=f"Зависимость {y_column} от {x_column}")
-        self.ax.grid(visible=True)
+        with span("ui.plot", x_column=x_column, rows=len(data_frame)):
+            if self.show_markers:
+                median_series = data_frame.groupby(x_column)[y_column].mean()
+                (self.line,) = self.ax.plot(
+                    median_series.index,
+                    median_series.to_numpy(),
+                )
+            else:
+                self.plot_series(data_frame[x_column], data_frame[y_column])
+            self.restyle()
+            settings_store().changed.connect(self.restyle)
+            self.ax.set_xlabel(xlabel=x_column)
+            self.ax.set_ylabel(ylabel=y_column)
+            self.ax.set_title(label=f"Зависимость {y_column} от {x_column}")
+            self.ax.grid(visible=True)
 
-        self.canvas.draw()
+            self.canvas.draw()
 
         self.save_button = QPushButton("Сохранить график")
         self.save_button.clicked.connect(self.save_plot)
@@ -59,6 +109,55 @@ class Plot(QDialog):
         layout.addWidget(self.save_button)
         self.setLayout(layout)
 
+    def plot_series(self: Self, x: ndarray, y: ndarray) -> None:
+        """Plot raw time series, keeping only points visible on screen."""
+        order = np.argsort(np.asarray(x), kind="stable")
+        self.x = np.asarray(x)[order]
+        self.y = np.asarray(y)[order]
+        self.x_days = date2num(self.x)
+        indices = min_max_indices(self.y, self.plot_buckets())
+        (self.line,) = self.ax.plot(self.x[indices], self.y[indices])
+        self.ax.callbacks.connect("xlim_changed", self.downsample)
+        self.resize_callback = self.canvas.mpl_connect(
+            "resize_event",
+            self.downsample,
+        )
+
+    def restyle(self: Self) -> None:
+        """Apply plot settings to the line."""
+        # matplotlib принимает отсутствие маркера как строку "None"
+        self.line.set_marker(
+            Settings.plot_marker() if self.show_markers else "None",
+        )
+        self.line.set_linestyle(Settings.plot_linestyle())
+        self.line.set_color(Settings.plot_color())
+        self.canvas.draw_idle()
+
+    def plot_buckets(self: Self) -> int:
+        """Get number of downsampling buckets for the canvas width."""
+        return max(self.canvas.get_width_height()[0], MIN_PLOT_BUCKETS)
+
+    def downsample(self: Self, _event: Axes | Event | None = None) -> None:
+        """Downsample the part of the series inside the current x limits."""
+        left, right = self.ax.get_xlim()
+        start = max(np.searchsorted(self.x_days, left) - 1, 0)
+        stop = np.searchsorted(self.x_days, right, side="right") + 1
+        indices = start + min_max_indices(
+            self.y[start:stop],
+            self.plot_buckets(),
+        )
+        self.line.set_data(self.x[indices], self.y[indices])
+        self.canvas.draw_idle()
+
+    @override
+    def closeEvent(self: Self, event: QCloseEvent) -> None:
+        # Освобождаем фигуру сразу, не дожидаясь сборщика мусора
+        settings_store().changed.disconnect(self.restyle)
+        if self.resize_callback is not None:
+            self.canvas.mpl_disconnect(self.resize_callback)
+        self.figure.clear()
+        super().closeEvent(event)
+
     def save_plot(self: Self) -> None:
         """Open a file dialog to save the current plot as an image file."""
         file_types = (
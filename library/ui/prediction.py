@@ -1,24 +1,30 @@
 """Prediction dialog module."""
 
 from enum import StrEnum
+from pathlib import Path
 from typing import Self, override
 
 from pandas import DataFrame
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtWidgets import (
     QCheckBox,
     QDialog,
+    QDoubleSpinBox,
     QFileDialog,
     QHBoxLayout,
     QLabel,
+    QMessageBox,
+    QProgressDialog,
     QPushButton,
     QTableView,
     QVBoxLayout,
     QWidget,
 )
 
+from library.instrumentation import span
 from library.ui.plot import Plot
 from library.ui.table import PandasModel
+from library.ui.worker import Worker, export_worker
 
 
 class TableFormat(StrEnum):
@@ -28,7 +34,12 @@ class TableFormat(StrEnum):
     CSV = "CSV (*.csv)"
     XML = "XML (*.xml)"
     HTML = "HTML (*.html)"
-    JSON = "JSON (*.json)"
+    JSON_LINES = "JSON Lines (*.jsonl)"
+
+    @property
+    def suffix(self: Self) -> str:
+        """Get file suffix of the format."""
+        return self.value[self.value.index("*") + 1 : -1]
 
 
 class PredictionDialog(QDialog):
@@ -44,12 +55,32 @@ class PredictionDialog(QDialog):
 
         layout = QVBoxLayout()
 
-        self.table = self.create_table(data_frame=data_frame)
+        with span("ui.create_table", rows=len(data_frame)):
+            self.table = self.create_table(data_frame=data_frame)
         layout.addWidget(self.table)
 
+        y_column = data_frame.columns[-1]
+        filter_layout = QHBoxLayout()
+        self.threshold_checkbox = QCheckBox(f"{y_column} больше:")
+        self.threshold_checkbox.toggled.connect(self.apply_filters)
+        filter_layout.addWidget(self.threshold_checkbox)
+        self.threshold = QDoubleSpinBox()
+        self.threshold.setRange(0, float(data_frame[y_column].max()) + 1)
+        self.threshold.setDecimals(1)
+        self.threshold.valueChanged.connect(self.apply_filters)
+        filter_layout.addWidget(self.threshold)
+        self.weekend_checkbox = QCheckBox("Только выходные")
+        self.weekend_checkbox.toggled.connect(self.apply_filters)
+        filter_layout.addWidget(self.weekend_checkbox)
+        layout.addLayout(filter_layout)
+
         self.export_button = QPushButton("Экспортировать таблицу")
         self.export_button.clicked.connect(self.export_table)
         layout.addWidget(self.export_button)
+        self.thread_pool = QThreadPool(parent=self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.export_worker: Worker | None = None
+        self.export_progress: QProgressDialog | None = None
 
         layout.addWidget(
             QLabel(
@@ -81,12 +112,29 @@ class PredictionDialog(QDialog):
     def create_table(self: Self, data_frame: DataFrame) -> QTableView:
         """Create prediction table."""
         table = QTableView()
-        table.setModel(PandasModel(parent=self, data_frame=data_frame))
-        table.horizontalHeader().setStretchLastSection(True)
+        self.table_model = PandasModel(parent=self, data_frame=data_frame)
+        table.setModel(self.table_model)
+        header = table.horizontalHeader()
+        header.setStretchLastSection(True)
+        # Без индикатора сортировки таблица открывается в исходном порядке
+        header.setSortIndicatorClearable(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        table.setSortingEnabled(True)
         return table
 
+    def apply_filters(self: Self) -> None:
+        """Show only rows matching the selected filters."""
+        mask = None
+        if self.threshold_checkbox.isChecked():
+            y_column = self.data_frame.columns[-1]
+            mask = self.table_model.column(y_column) > self.threshold.value()
+        if self.weekend_checkbox.isChecked():
+            weekend = self.table_model.column("is_weekend") == 1
+            mask = weekend if mask is None else mask & weekend
+        self.table_model.set_filter(mask)
+
     def export_table(self: Self) -> None:
-        """Export table to file."""
+        """Export table to file in background."""
         file_path, file_type = QFileDialog.getSaveFileName(
             parent=self,
             caption="Сохранить таблицу",
@@ -94,18 +142,46 @@ class PredictionDialog(QDialog):
                 table_format.value for table_format in TableFormat
             ),
         )
-        if file_path:
-            match file_type:
-                case TableFormat.XLSX:
-                    self.data_frame.to_excel(file_path)
-                case TableFormat.CSV:
-                    self.data_frame.to_csv(file_path)
-                case TableFormat.XML:
-                    self.data_frame.to_xml(file_path)
-                case TableFormat.HTML:
-                    self.data_frame.to_html(file_path)
-                case TableFormat.JSON:
-                    self.data_frame.to_json(file_path)
+        if not file_path:
+            return
+        path = Path(file_path)
+        suffix = TableFormat(file_type).suffix
+        if path.suffix != suffix:
+            path = path.with_name(path.name + suffix)
+
+        self.export_worker = export_worker(self.data_frame, path)
+        self.export_worker.setAutoDelete(False)
+        self.export_progress = QProgressDialog(
+            "Экспорт таблицы",
+            "Отменить",
+            0,
+            len(self.data_frame),
+            self,
+        )
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.signals.progress.connect(
+            lambda done, _total: self.export_progress.setValue(done),
+        )
+        self.export_worker.signals.finished.connect(self.finish_export)
+        self.export_worker.signals.cancelled.connect(self.finish_export)
+        self.export_worker.signals.failed.connect(self.export_failed)
+
+        self.export_button.setEnabled(False)
+        self.thread_pool.start(self.export_worker)
+
+    def finish_export(self: Self) -> None:
+        """Release finished export worker."""
+        if self.export_progress is not None:
+            self.export_progress.close()
+        self.export_progress = None
+        self.export_worker = None
+        self.export_button.setEnabled(True)
+
+    def export_failed(self: Self, message: str) -> None:
+        """Show export error."""
+        self.finish_export()
+        QMessageBox.critical(self, "Ошибка экспорта", message)
 
     def show_selected_graphs(self: Self) -> None:
         """Show selected graphs."""
@@ -1,10 +1,14 @@
 """Settings module."""
 
+import atexit
+from contextlib import suppress
+from functools import cache
 from pathlib import Path
-from typing import Self, override
+from typing import Any, Self, override
 
 from msgspec import DecodeError
 from msgspec.toml import decode, encode
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
 from PySide6.QtWidgets import (
     QColorDialog,
     QComboBox,
@@ -16,11 +20,103 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from library.files import atomic_write
+
+SETTINGS_PATH = Path("./settings.toml")
+SETTINGS_WRITE_DELAY = 500
+
+
+class SettingsStore(QObject):
+    """
+    In-memory settings backed by a TOML file.
+
+    The file is read again only when its modification time changes, and
+    writes are coalesced into one atomic rewrite after `write_delay`
+    milliseconds without changes.
+    """
+
+    changed = Signal(str, object)
+
+    @override
+    def __init__(
+        self: Self,
+        path: Path,
+        write_delay: int = SETTINGS_WRITE_DELAY,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self._data: dict[str, Any] = {}
+        self._mtime: int | None = None
+        self._dirty = False
+        self._write_timer = QTimer(self)
+        self._write_timer.setSingleShot(True)
+        self._write_timer.setInterval(write_delay)
+        self._write_timer.timeout.connect(self.flush)
+        # Таймер должен работать в потоке цикла событий, даже если модуль
+        # впервые импортирован из фонового потока
+        if (app := QCoreApplication.instance()) is not None:
+            self.moveToThread(app.thread())
+
+    def _reload_if_changed(self: Self) -> None:
+        """Read the file again if it was changed by someone else."""
+        # Несохранённые изменения новее файла
+        if self._dirty:
+            return
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self._data = {}
+        if mtime is not None:
+            with suppress(DecodeError):
+                self._data = decode(self.path.read_bytes())
+
+    def get[T](self: Self, name: str, default: T = None) -> T:
+        """Get value of the setting."""
+        self._reload_if_changed()
+        return self._data.get(name, default)
+
+    def set[T](self: Self, name: str, value: T) -> T:
+        """Set value of the setting and schedule writing the file."""
+        self._reload_if_changed()
+        if self._data.get(name) != value:
+            self._data[name] = value
+            self._dirty = True
+            self._write_timer.start()
+            self.changed.emit(name, value)
+        return value
+
+    def flush(self: Self) -> None:
+        """Write pending changes to the file."""
+        self._write_timer.stop()
+        if not self._dirty:
+            return
+        with atomic_write(self.path) as file:
+            file.write(encode(self._data))
+        self._mtime = self.path.stat().st_mtime_ns
+        self._dirty = False
+
+
+@cache
+def settings_store() -> SettingsStore:
+    """
+    Get the application settings store.
+
+    It is created on first use, so importing this module creates no Qt
+    objects and is safe from any thread.
+    """
+    store = SettingsStore(SETTINGS_PATH)
+    # Отложенная запись не должна теряться при выходе из приложения
+    atexit.register(store.flush)
+    return store
+
 
 class Settings(QDialog):
     """Application settings."""
 
-    file_name = "./settings.toml"
     plot_markers = ("o", "s", "^")
     plot_linestyles = ("-", "--", "-.", ":")
 
@@ -75,45 +171,15 @@ class Settings(QDialog):
         layout.addWidget(select_color_button)
         self.setLayout(layout)
 
-    @staticmethod
-    def check_file() -> None:
-        """Check if file exists."""
-        if not Path(Settings.file_name).exists():
-            Path(Settings.file_name).touch()
-
     @staticmethod
     def get_property[T](name: str, default: T = None) -> T:
         """Get property."""
-        Settings.check_file()
-
-        with Path(Settings.file_name).open(mode="r") as file:
-            try:
-                data = decode(file.read())
-            except DecodeError:
-                data = {}
-
-        if name in data:
-            return data[name]
-
-        return default
+        return settings_store().get(name, default)
 
     @staticmethod
     def set_property[T](name: str, value: T) -> T:
         """Set property."""
-        Settings.check_file()
-
-        with Path(Settings.file_name).open(mode="r") as file:
-            try:
-                data = decode(file.read())
-            except DecodeError:
-                data = {}
-
-        data[name] = value
-
-        with Path(Settings.file_name).open(mode="wb") as file:
-            file.write(encode(data))
-
-        return value
+        return settings_store().set(name, value)
 
     @staticmethod
     def plot_marker() -> str:
@@ -0,0 +1,93 @@
+"""Startup profiling module."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Модули, которых не должно быть в памяти до первой отрисовки окна
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "msgspec",
+    "openpyxl",
+    "library.boosting",
+)
+SPAWN_TIME_VARIABLE = "STARTUP_PROFILE_SPAWN_TIME"
+FIRST_PAINT_LIMIT = 1.5
+
+
+def report_first_paint() -> None:
+    """Print time since the profiler started this process as JSON."""
+    spawn_time = float(os.environ[SPAWN_TIME_VARIABLE])
+    report = {
+        "first_paint": time.time() - spawn_time,
+        "heavy_modules": [
+            module for module in HEAVY_MODULES if module in sys.modules
+        ],
+    }
+    sys.stdout.write(json.dumps(report) + "\n")
+    sys.stdout.flush()
+
+
+def parse_import_times(log: str) -> list[tuple[int, int, str]]:
+    """Parse `-X importtime` output to self and cumulative microseconds."""
+    rows = []
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, module = line.removeprefix(
+            "import time:",
+        ).split("|")
+        rows.append((int(self_time), int(cumulative), module.rstrip()))
+    return rows
+
+
+def profile_startup(
+    main_path: Path,
+    top: int = 15,
+    limit: float = FIRST_PAINT_LIMIT,
+) -> int:
+    """
+    Start the application with `-X importtime` until its first paint.
+
+    Prints the slowest imports and time to first paint, and returns exit
+    status 1 if the time exceeds `limit` seconds or a heavy module was
+    imported before the window appeared.
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", main_path, "--first-paint"],
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, SPAWN_TIME_VARIABLE: str(time.time())},
+    )
+    if result.returncode:
+        sys.stderr.write(result.stderr)
+        return result.returncode
+    report = json.loads(result.stdout.splitlines()[-1])
+
+    lines = [f"{'self, ms':>10} {'cumulative, ms':>15}  module"]
+    lines.extend(
+        f"{self_time / 1000:>10.1f} {cumulative / 1000:>15.1f}  {module}"
+        for self_time, cumulative, module in sorted(
+            parse_import_times(result.stderr),
+            key=lambda row: row[1],
+            reverse=True,
+        )[:top]
+    )
+    lines.append(f"Time to first paint: {report['first_paint']:.3f} s")
+    lines.append(
+        "Heavy modules before first paint: "
+        f"{', '.join(report['heavy_modules']) or 'none'}",
+    )
+    failed = report["first_paint"] > limit or report["heavy_modules"]
+    lines.append(
+        f"{'FAIL' if failed else 'OK'}: expected first paint within "
+        f"{limit:.3f} s without heavy modules",
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
+    return int(bool(failed))
@@ -1,8 +1,12 @@
 """Pandas table model module."""
 
+from collections import OrderedDict
+from collections.abc import Callable
 from typing import Self, override
 
-from pandas import DataFrame
+import numpy as np
+from numpy import ndarray
+from pandas import DataFrame, Timestamp
 from PySide6.QtCore import (
     QAbstractTableModel,
     QModelIndex,
@@ -11,22 +15,134 @@ from PySide6.QtCore import (
     Qt,
 )
 
+from library.instrumentation import count
+
+ROW_BATCH_SIZE = 4096
+CELL_CACHE_SIZE = 16_384
+
+
+def column_formatter(column: ndarray) -> Callable[[object], str]:
+    """Get function formatting values of the column like pandas does."""
+    if column.dtype.kind == "M":
+        return lambda value: str(Timestamp(value))
+    return str
+
 
 class PandasModel(QAbstractTableModel):
-    """Pandas table model."""
+    """
+    Pandas table model.
+
+    Values are read from per-column NumPy arrays and formatted only when a
+    cell is shown. Rows are exposed in batches through `fetchMore`. Sorting
+    and filtering only rebuild `row_map`, the source row of each view row.
+    """
 
     @override
     def __init__(self: Self, parent: QObject, data_frame: DataFrame) -> None:
         super().__init__(parent=parent)
         self.data_frame = data_frame
+        self.columns = [
+            data_frame[column].to_numpy() for column in data_frame.columns
+        ]
+        self.formatters = [column_formatter(column) for column in self.columns]
+        self.headers = [str(column) for column in data_frame.columns]
+        self.row_labels = data_frame.index.to_numpy()
+        self.filtered_rows = np.arange(len(data_frame))
+        self.row_map = self.filtered_rows
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self.loaded_rows = min(ROW_BATCH_SIZE, len(self.row_map))
+        self._cells: OrderedDict[tuple[int, int], str] = OrderedDict()
 
     @override
     def rowCount(self: Self, *_args: object, **_kwargs: object) -> int:
-        return len(self.data_frame)
+        return self.loaded_rows
 
     @override
     def columnCount(self, *_args: object, **_kwargs: object) -> int:
-        return self.data_frame.columns.size
+        return len(self.columns)
+
+    @override
+    def canFetchMore(
+        self: Self,
+        parent: QModelIndex | QPersistentModelIndex,
+    ) -> bool:
+        if parent.isValid():
+            return False
+        return self.loaded_rows < len(self.row_map)
+
+    @override
+    def fetchMore(
+        self: Self,
+        parent: QModelIndex | QPersistentModelIndex,
+    ) -> None:
+        if parent.isValid():
+            return
+        n_rows = min(ROW_BATCH_SIZE, len(self.row_map) - self.loaded_rows)
+        if n_rows <= 0:
+            return
+        self.beginInsertRows(
+            QModelIndex(),
+            self.loaded_rows,
+            self.loaded_rows + n_rows - 1,
+        )
+        self.loaded_rows += n_rows
+        self.endInsertRows()
+
+    def column(self: Self, name: str) -> ndarray:
+        """Get values of the column in source row order."""
+        return self.columns[self.headers.index(name)]
+
+    def sorted_rows(self: Self, rows: ndarray) -> ndarray:
+        """Order source rows by the sort column, keeping ties stable."""
+        if self.sort_column < 0:
+            return rows
+        values = self.columns[self.sort_column]
+        if self.sort_order == Qt.SortOrder.AscendingOrder:
+            return rows[np.argsort(values[rows], kind="stable")]
+        # Разворот до и после сортировки сохраняет порядок равных значений
+        rows = rows[::-1]
+        return rows[np.argsort(values[rows], kind="stable")[::-1]]
+
+    def update_row_map(self: Self) -> None:
+        """Rebuild view rows from the filter and the sort column."""
+        self.beginResetModel()
+        self.row_map = self.sorted_rows(self.filtered_rows)
+        self.loaded_rows = min(ROW_BATCH_SIZE, len(self.row_map))
+        self.endResetModel()
+
+    @override
+    def sort(
+        self: Self,
+        column: int,
+        order: Qt.SortOrder = Qt.SortOrder.AscendingOrder,
+    ) -> None:
+        self.sort_column = column
+        self.sort_order = order
+        self.update_row_map()
+
+    def set_filter(self: Self, mask: ndarray | None) -> None:
+        """Show only source rows where `mask` is true, or all rows."""
+        self.filtered_rows = (
+            np.arange(len(self.data_frame))
+            if mask is None
+            else np.flatnonzero(mask)
+        )
+        self.update_row_map()
+
+    def cell_text(self: Self, row: int, column: int) -> str:
+        """Get formatted value of the source cell, caching recent ones."""
+        key = (row, column)
+        text = self._cells.get(key)
+        if text is not None:
+            self._cells.move_to_end(key)
+            return text
+        text = self.formatters[column](self.columns[column][row])
+        count("table.cells_formatted")
+        self._cells[key] = text
+        if len(self._cells) > CELL_CACHE_SIZE:
+            self._cells.popitem(last=False)
+        return text
 
     @override
     def data(
@@ -37,7 +153,10 @@ class PandasModel(QAbstractTableModel):
         if not index.isValid():
             return None
         if role == Qt.ItemDataRole.DisplayRole:
-            return str(self.data_frame.iloc[index.row(), index.column()])
+            return self.cell_text(
+                int(self.row_map[index.row()]),
+                index.column(),
+            )
         return None
 
     @override
@@ -49,7 +168,7 @@ class PandasModel(QAbstractTableModel):
     ) -> str | None:
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                return str(self.data_frame.columns[section])
+                return self.headers[section]
             if orientation == Qt.Orientation.Vertical:
-                return str(self.data_frame.index[section])
+                return str(self.row_labels[self.row_map[section]])
         return None
@@ -0,0 +1,96 @@
+"""Background worker module."""
+
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Self, override
+
+from pandas import DataFrame
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from library.export import ExportCancelledError, export_frame
+from library.functional import PredictionCancelledError, model_predict
+
+
+@dataclass(frozen=True)
+class PredictionRequest:
+    """Parameters of a prediction job."""
+
+    company_name: str
+    start: datetime
+    end: datetime
+
+
+class WorkerSignals(QObject):
+    """Signals of a worker, delivered to the GUI thread."""
+
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class Worker(QRunnable):
+    """
+    Cancellable job for a thread pool.
+
+    `job` gets the worker to report progress through its signals and to
+    poll `is_cancelled`, and returns the result.
+    """
+
+    @override
+    def __init__(self: Self, job: Callable[["Worker"], object]) -> None:
+        super().__init__()
+        self.job = job
+        # Сигналы создаются в потоке GUI, поэтому слоты вызываются в нём же
+        self.signals = WorkerSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self: Self) -> None:
+        """Ask the worker to stop after the current chunk."""
+        self._cancel_event.set()
+
+    def is_cancelled(self: Self) -> bool:
+        """Check whether cancellation was requested."""
+        return self._cancel_event.is_set()
+
+    @override
+    def run(self: Self) -> None:
+        try:
+            result = self.job(self)
+        except (PredictionCancelledError, ExportCancelledError):
+            self.signals.cancelled.emit()
+        except Exception as error:  # noqa: BLE001
+            self.signals.failed.emit(str(error))
+        else:
+            self.signals.finished.emit(result)
+
+
+def prediction_worker(request: PredictionRequest) -> Worker:
+    """Create a worker running `model_predict` for the request."""
+    return Worker(
+        lambda worker: model_predict(
+            request.company_name,
+            request.start,
+            request.end,
+            progress=worker.signals.progress.emit,
+            is_cancelled=worker.is_cancelled,
+        ),
+    )
+
+
+def export_worker(data_frame: DataFrame, path: Path) -> Worker:
+    """Create a worker running `export_frame`, finishing with the path."""
+
+    def export(worker: Worker) -> Path:
+        export_frame(
+            data_frame,
+            path,
+            progress=worker.signals.progress.emit,
+            is_cancelled=worker.is_cancelled,
+        )
+        return path
+
+    return Worker(export)
@@ -1,16 +1,46 @@
 """Main file."""
 
 import sys
+from argparse import SUPPRESS, ArgumentParser
+from pathlib import Path
 from sys import argv
 
 from library.ui.app import App
+from library.ui.startup import (
+    FIRST_PAINT_LIMIT,
+    profile_startup,
+    report_first_paint,
+)
 from PySide6.QtWidgets import QApplication
 
 
 def main() -> None:
     """Start application."""
-    app = QApplication(argv)
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report import costs and time to first paint, then exit",
+    )
+    parser.add_argument(
+        "--startup-limit",
+        type=float,
+        default=FIRST_PAINT_LIMIT,
+        help="time to first paint in seconds that fails the profile",
+    )
+    parser.add_argument("--first-paint", action="store_true", help=SUPPRESS)
+    args, qt_args = parser.parse_known_args(argv[1:])
+
+    if args.profile_startup:
+        sys.exit(profile_startup(Path(__file__), limit=args.startup_limit))
+
+    app = QApplication([argv[0], *qt_args])
     window = App()
+    if args.first_paint:
+        window.first_painted.connect(report_first_paint)
+        window.first_painted.connect(app.quit)
+    else:
+        window.first_painted.connect(window.warm_up_in_background)
     window.resize(350, 250)
     window.show()
     sys.exit(app.exec())
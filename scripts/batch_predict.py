@@ -0,0 +1,279 @@
+"""Batch prediction script."""
+
+import csv
+import os
+import sys
+import threading
+from argparse import ArgumentParser
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from queue import Queue
+from time import perf_counter
+from typing import Self
+
+from library.export import (
+    PREDICTION_FORMATS,
+    ExportCancelledError,
+    write_predictions,
+)
+from library.functional import iter_predictions, prediction_length
+from pandas import DataFrame, RangeIndex
+
+JOB_COLUMNS = ("company", "start", "end", "output")
+WRITER_QUEUE_SIZE = 2
+# Метки конца потока кусков для потоков записи
+_END = object()
+_ABORT = object()
+
+
+@dataclass(frozen=True)
+class Job:
+    """Prediction of one company for an interval saved to a file."""
+
+    company: str
+    start: datetime
+    end: datetime
+    output: Path
+
+
+@dataclass(frozen=True)
+class CompanyResult:
+    """Rows written per output file and rows actually predicted."""
+
+    written: dict[Path, int]
+    predicted: int
+    elapsed: float
+
+
+def read_jobs(path: Path) -> list[Job]:
+    """
+    Read jobs from a CSV file with `company,start,end,output` columns.
+
+    Dates are in ISO format, output paths end with `.csv` or `.npy`.
+    """
+    with path.open(mode="r", newline="") as file:
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None or set(JOB_COLUMNS) - set(
+            reader.fieldnames,
+        ):
+            msg = f"Jobs file must have columns: {', '.join(JOB_COLUMNS)}"
+            raise ValueError(msg)
+        jobs = [
+            Job(
+                row["company"],
+                datetime.fromisoformat(row["start"]),
+                datetime.fromisoformat(row["end"]),
+                Path(row["output"]),
+            )
+            for row in reader
+        ]
+
+    outputs = set()
+    for job in jobs:
+        if job.output.suffix not in PREDICTION_FORMATS:
+            msg = f"Unsupported export format: {job.output}"
+            raise ValueError(msg)
+        if job.output in outputs:
+            msg = f"Output is used by several jobs: {job.output}"
+            raise ValueError(msg)
+        outputs.add(job.output)
+    return jobs
+
+
+def merge_intervals(
+    jobs: list[Job],
+) -> list[tuple[datetime, datetime, list[Job]]]:
+    """
+    Group jobs of one company whose hourly intervals overlap or touch.
+
+    Jobs of a group lie on the same hourly grid, so each of them is a
+    slice of the group prediction.
+    """
+    groups: list[tuple[datetime, datetime, list[Job]]] = []
+    for job in sorted(jobs, key=lambda job: job.start):
+        if job.start > job.end:
+            groups.append((job.start, job.end, [job]))
+            continue
+        if groups:
+            start, end, group = groups[-1]
+            if (
+                start <= end
+                and job.start <= end + timedelta(hours=1)
+                and (job.start - start) % timedelta(hours=1) == timedelta(0)
+            ):
+                groups[-1] = (start, max(end, job.end), [*group, job])
+                continue
+        groups.append((job.start, job.end, [job]))
+    return groups
+
+
+class JobWriter:
+    """
+    Writer of one job running on its own thread.
+
+    The prediction loop of a merged interval sends every chunk to all its
+    jobs, and each writer takes the rows of its job through a bounded
+    queue, so memory stays at a few chunks for any interval length.
+    """
+
+    def __init__(self: Self, job: Job, offset: int) -> None:
+        """Start writing rows from `offset` of the merged prediction."""
+        self.job = job
+        self.offset = offset
+        self.length = prediction_length(job.start, job.end)
+        self.error: BaseException | None = None
+        self._queue: Queue[DataFrame | object] = Queue(WRITER_QUEUE_SIZE)
+        self._closed = False
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def send(self: Self, chunk: DataFrame) -> None:
+        """Pass the rows of the job from a chunk of the merged prediction."""
+        first = chunk.index.start
+        start = max(first, self.offset)
+        stop = min(chunk.index.stop, self.offset + self.length)
+        if start >= stop:
+            return
+        rows = chunk.iloc[start - first : stop - first]
+        # Строки файла нумеруются от начала задачи, как при экспорте
+        self._queue.put(
+            rows.set_axis(RangeIndex(start - self.offset, stop - self.offset)),
+        )
+
+    def close(self: Self, *, abort: bool = False) -> None:
+        """Finish the file, or discard it if `abort` is true."""
+        self._queue.put(_ABORT if abort else _END)
+        self._thread.join()
+
+    def _chunks(self: Self) -> Iterator[DataFrame]:
+        while (chunk := self._queue.get()) is not _END:
+            if chunk is _ABORT:
+                self._closed = True
+                msg = "Prediction failed"
+                raise ExportCancelledError(msg)
+            yield chunk
+        self._closed = True
+
+    def _write(self: Self) -> None:
+        try:
+            write_predictions(self.job.output, self._chunks(), self.length)
+        except BaseException as error:  # noqa: BLE001
+            self.error = error
+            # Дочитываем очередь, чтобы не блокировать цикл предсказания
+            while not self._closed:
+                chunk = self._queue.get()
+                self._closed = chunk is _END or chunk is _ABORT
+
+
+def predict_interval(
+    start: datetime,
+    end: datetime,
+    jobs: list[Job],
+) -> int:
+    """Predict a merged interval once, writing every job, and count rows."""
+    company_name = jobs[0].company
+    if len(jobs) == 1:
+        length = prediction_length(start, end)
+        write_predictions(
+            jobs[0].output,
+            iter_predictions(company_name, start, end),
+            length,
+        )
+        return length
+
+    writers = [
+        JobWriter(job, (job.start - start) // timedelta(hours=1))
+        for job in jobs
+    ]
+    predicted = 0
+    try:
+        for chunk in iter_predictions(company_name, start, end):
+            for writer in writers:
+                writer.send(chunk)
+            predicted += len(chunk)
+    except BaseException:
+        for writer in writers:
+            writer.close(abort=True)
+        raise
+    for writer in writers:
+        writer.close()
+    for writer in writers:
+        if writer.error is not None:
+            raise writer.error
+    return predicted
+
+
+def predict_company(jobs: list[Job]) -> CompanyResult:
+    """Run all jobs of one company, predicting overlapping intervals once."""
+    start_time = perf_counter()
+    predicted = 0
+    for start, end, group in merge_intervals(jobs):
+        predicted += predict_interval(start, end, group)
+    return CompanyResult(
+        {job.output: prediction_length(job.start, job.end) for job in jobs},
+        predicted,
+        perf_counter() - start_time,
+    )
+
+
+def main() -> None:
+    """Run prediction jobs without the user interface."""
+    parser = ArgumentParser(description="Predict energy consumption in batch.")
+    parser.add_argument(
+        "jobs",
+        type=Path,
+        help="CSV file with company, start, end and output columns",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of prediction processes",
+    )
+    args = parser.parse_args()
+
+    jobs_by_company = defaultdict(list)
+    for job in read_jobs(args.jobs):
+        jobs_by_company[job.company].append(job)
+
+    start_time = perf_counter()
+    written_rows = predicted_rows = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(predict_company, jobs): company_name
+            for company_name, jobs in jobs_by_company.items()
+        }
+        for future in as_completed(futures):
+            company_name = futures[future]
+            if (error := future.exception()) is not None:
+                failed.append(company_name)
+                print(f"Prediction failed: {company_name}: {error!r}")
+                continue
+            result = future.result()
+            for output, rows in result.written.items():
+                print(f"{company_name}: {rows} rows -> {output}")
+            written_rows += sum(result.written.values())
+            predicted_rows += result.predicted
+            print(
+                f"{company_name}: {result.predicted} rows predicted "
+                f"in {result.elapsed:.2f} s",
+            )
+    elapsed = perf_counter() - start_time
+
+    print(
+        f"Written {written_rows} rows ({predicted_rows} predicted) "
+        f"for {len(jobs_by_company) - len(failed)} companies in "
+        f"{elapsed:.2f} s: {written_rows / elapsed:.0f} rows/s",
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Pickled model conversion script."""
+
+from argparse import ArgumentParser
+
+from library.functional import (
+    LEGACY_MODEL_FILE_ENDING,
+    MODELS_DIRECTORY,
+    load_legacy_model,
+    model_path,
+    save_model,
+)
+
+
+def main() -> None:
+    """Convert pickled models to the compact model format."""
+    parser = ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="overwrite models that are already converted",
+    )
+    args = parser.parse_args()
+
+    for path in sorted(MODELS_DIRECTORY.glob(f"*{LEGACY_MODEL_FILE_ENDING}")):
+        company_name = path.name.removesuffix(LEGACY_MODEL_FILE_ENDING)
+        if model_path(company_name).exists() and not args.force:
+            continue
+        save_model(company_name, load_legacy_model(company_name))
+        print(f"Model converted: {company_name}")
+
+
+if __name__ == "__main__":
+    main()
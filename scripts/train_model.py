@@ -1,18 +1,201 @@
 """Model training script."""
 
+import hashlib
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 
-from library.functional import pickle_model
+from library import boosting, features, functional, model_file, store
+from library.boosting import TrainingProgress
+from library.files import atomic_write
+from library.functional import (
+    MODEL_PARAMS,
+    existing_model_path,
+    model_path,
+    train_model,
+)
+from library.store import company_data_path
 
+MANIFEST_PATH = Path("./data/models/manifest.json")
+CODE_MODULES = (boosting, features, functional, model_file, store)
 
-def main() -> None:
-    """Train models and save them."""
+
+def print_progress(company_name: str, progress: TrainingProgress) -> None:
+    """Print training progress of the company model."""
+    print(
+        f"{company_name}: tree {progress.n_trees}/{progress.n_estimators}, "
+        f"loss {progress.loss:.1f}, {progress.elapsed:.1f} s",
+        flush=True,
+    )
+
+
+def file_hash(path: Path) -> str:
+    """Get SHA-256 hash of the file content."""
+    digest = hashlib.sha256()
+    with path.open(mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version() -> str:
+    """Get hash of the source code that affects trained models."""
+    digest = hashlib.sha256()
+    for module in CODE_MODULES:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def load_manifest() -> dict[str, dict]:
+    """Load the manifest of trained models."""
+    try:
+        with MANIFEST_PATH.open(mode="r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest: dict[str, dict]) -> None:
+    """Save the manifest of trained models."""
+    with atomic_write(MANIFEST_PATH, mode="w") as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+
+
+def manifest_entry(company_name: str, version: str) -> dict:
+    """Describe inputs the model of the company is trained on."""
+    data_path = company_data_path(company_name)
+    stat = data_path.stat()
+    return {
+        "data_sha256": file_hash(data_path),
+        "data_size": stat.st_size,
+        "data_mtime_ns": stat.st_mtime_ns,
+        "params": MODEL_PARAMS,
+        "code_version": version,
+    }
+
+
+def is_stale(company_name: str, entry: dict | None, version: str) -> bool:
+    """Check if the model must be retrained."""
+    if entry is None or not model_path(company_name).exists():
+        return True
+    if entry["params"] != MODEL_PARAMS or entry["code_version"] != version:
+        return True
+    stat = company_data_path(company_name).stat()
+    if (stat.st_size, stat.st_mtime_ns) == (
+        entry["data_size"],
+        entry["data_mtime_ns"],
+    ):
+        return False
+    # Файл трогали - переобучаем, только если изменилось содержимое
+    return file_hash(company_data_path(company_name)) != entry["data_sha256"]
+
+
+def can_warm_start(
+    company_name: str,
+    entry: dict | None,
+    version: str,
+) -> bool:
+    """Check if new trees may be appended to the saved model."""
+    # Деревья, обученные другим кодом или при других параметрах (например,
+    # на другой схеме признаков), нельзя дополнять новыми
+    return (
+        existing_model_path(company_name).exists()
+        and entry is not None
+        and entry["params"] == MODEL_PARAMS
+        and entry["code_version"] == version
+    )
+
+
+def get_companies() -> list[str]:
+    """Get names of all companies with data."""
     file_ending_length = 11
+    return sorted(
+        company.name[:-file_ending_length]
+        for company in Path("./data/companies/").iterdir()
+    )
+
+
+def main() -> None:
+    """Train stale models and save them."""
+    parser = ArgumentParser(description="Train energy consumption models.")
+    parser.add_argument(
+        "companies",
+        nargs="*",
+        help="companies to train (all by default)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of training processes",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="retrain models even if they are up to date",
+    )
+    parser.add_argument(
+        "-w",
+        "--warm-start",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "append N trees to existing models instead of retraining, "
+            "unless code or parameters changed since they were trained"
+        ),
+    )
+    args = parser.parse_args()
+
+    version = code_version()
+    manifest = load_manifest()
+    companies = [
+        company_name
+        for company_name in args.companies or get_companies()
+        if args.force
+        or is_stale(company_name, manifest.get(company_name), version)
+    ]
+
+    # Хеши данных считаем до обучения: файл может измениться во время него
+    entries = {
+        company_name: manifest_entry(company_name, version)
+        for company_name in companies
+    }
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                train_model,
+                company_name,
+                args.warm_start
+                if can_warm_start(
+                    company_name,
+                    manifest.get(company_name),
+                    version,
+                )
+                else 0,
+                progress=partial(print_progress, company_name),
+            ): company_name
+            for company_name in companies
+        }
+        for future in as_completed(futures):
+            company_name = futures[future]
+            if (error := future.exception()) is not None:
+                failed.append(company_name)
+                print(f"Model training failed: {company_name}: {error!r}")
+                continue
+            manifest[company_name] = entries[company_name]
+            save_manifest(manifest)
+            print(f"Model trained: {company_name}")
 
-    for company in Path("./data/companies/").iterdir():
-        company_name = company.name[:-file_ending_length]
-        if not Path(f"./data/models/{company_name}_regressor.pkl").exists():
-            pickle_model(company_name)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""Shared test fixtures."""
+
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Run tests from the repository root, where `./data/` is."""
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,218 @@
+"""Decision tree and gradient boosting tests."""
+
+import tracemalloc
+from collections.abc import Callable
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from library.boosting import (
+    TREE_LEAF,
+    DecisionTreeRegressor,
+    GradientBoostingRegressor,
+)
+from library.functional import extract_features
+
+# Пиковая память обучения относительно матрицы признаков
+PEAK_MEMORY_LIMIT = 1.25
+
+type Tree = float | tuple[int, float, "Tree", "Tree"]
+
+
+def baseline_mse(y: np.ndarray) -> float:
+    """Compute MSE of a node side as the loop splitter did."""
+    return np.mean((y - np.mean(y)) ** 2)
+
+
+def exact_mse(y: np.ndarray) -> Fraction:
+    """Compute MSE of a node side without rounding."""
+    values = [Fraction(float(value)) for value in y]
+    node_mean = sum(values) / len(values)
+    return sum((value - node_mean) ** 2 for value in values) / len(values)
+
+
+def baseline_split(
+    x: np.ndarray,
+    y: np.ndarray,
+    mse: Callable[[np.ndarray], float] = baseline_mse,
+) -> tuple[int | None, float | None]:
+    """Find the best split as the loop splitter before prefix sums did."""
+    best_mse = float("inf")
+    best_feature, best_threshold = None, None
+    for feature_idx in range(x.shape[1]):
+        for threshold in np.unique(x[:, feature_idx]):
+            left_mask = x[:, feature_idx] <= threshold
+            right_mask = ~left_mask
+            if np.sum(left_mask) == 0 or np.sum(right_mask) == 0:
+                continue
+            split_mse = (
+                mse(y[left_mask]) * np.sum(left_mask)
+                + mse(y[right_mask]) * np.sum(right_mask)
+            ) / len(y)
+            if split_mse < best_mse:
+                best_mse = split_mse
+                best_feature = feature_idx
+                best_threshold = threshold
+    return best_feature, best_threshold
+
+
+def baseline_tree(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_depth: int,
+    mse: Callable[[np.ndarray], float] = baseline_mse,
+    depth: int = 0,
+) -> Tree:
+    """Build a tree by recursive copying, as before the row index array."""
+    if depth >= max_depth or len(np.unique(y)) == 1:
+        return float(np.mean(y))
+    feature_idx, threshold = baseline_split(x, y, mse)
+    if feature_idx is None:
+        return float(np.mean(y))
+    left_mask = x[:, feature_idx] <= threshold
+    return (
+        feature_idx,
+        float(threshold),
+        baseline_tree(x[left_mask], y[left_mask], max_depth, mse, depth + 1),
+        baseline_tree(x[~left_mask], y[~left_mask], max_depth, mse, depth + 1),
+    )
+
+
+def nested_tree(tree: DecisionTreeRegressor, node_id: int = 0) -> Tree:
+    """Convert array-backed tree nodes to the `baseline_tree` form."""
+    if tree.feature[node_id] == TREE_LEAF:
+        return float(tree.value[node_id])
+    return (
+        int(tree.feature[node_id]),
+        float(tree.threshold[node_id]),
+        nested_tree(tree, tree.left[node_id]),
+        nested_tree(tree, tree.right[node_id]),
+    )
+
+
+def assert_same_tree(actual: Tree, expected: Tree) -> None:
+    """Check equal splits, leaf means may differ in summation order."""
+    if isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-12, abs=1e-12)
+        return
+    assert not isinstance(actual, float)
+    assert actual[:2] == expected[:2]
+    assert_same_tree(actual[2], expected[2])
+    assert_same_tree(actual[3], expected[3])
+
+
+def small_dataset(
+    rng: np.random.Generator,
+    *,
+    integer_target: bool,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Generate features with many repeated values and a target."""
+    n_rows = int(rng.integers(5, 60))
+    x = rng.integers(0, rng.integers(2, 10), (n_rows, 4)).astype(float)
+    if integer_target:
+        return x, rng.integers(0, 5, n_rows).astype(float)
+    return x, rng.normal(size=n_rows)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_exact_splitter_matches_loop_splitter(seed: int) -> None:
+    """Presorted prefix sums give the trees of the loop splitter."""
+    x, y = small_dataset(
+        np.random.default_rng(seed),
+        integer_target=False,
+    )
+    tree = DecisionTreeRegressor(max_depth=3)
+    tree.fit(x, y)
+    assert_same_tree(nested_tree(tree), baseline_tree(x, y, max_depth=3))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_exact_splitter_breaks_ties_like_exact_arithmetic(seed: int) -> None:
+    """
+    Check the tie rule on targets with many equal split losses.
+
+    Losses within `TIE_TOLERANCE` of the node variance are ties, won by the
+    first feature and then the lowest threshold. That is the choice of the
+    loop splitter in exact arithmetic, while in floats it sometimes picked
+    a later split whose loss was smaller only by rounding.
+    """
+    x, y = small_dataset(
+        np.random.default_rng(seed),
+        integer_target=True,
+    )
+    tree = DecisionTreeRegressor(max_depth=3)
+    tree.fit(x, y)
+    assert_same_tree(
+        nested_tree(tree),
+        baseline_tree(x, y, max_depth=3, mse=exact_mse),
+    )
+
+
+def test_exact_splitter_prefers_first_feature_on_tie() -> None:
+    """A duplicated feature never wins over its first copy."""
+    rng = np.random.default_rng(0)
+    feature = rng.integers(0, 5, 50).astype(float)
+    x = np.column_stack((feature, feature))
+    tree = DecisionTreeRegressor(max_depth=1)
+    tree.fit(x, feature * 0.1)
+    assert tree.feature[0] == 0
+
+
+@pytest.mark.parametrize("splitter", ["exact", "histogram"])
+def test_training_peak_memory_is_close_to_input(splitter: str) -> None:
+    """Tree building does not copy the feature matrix per node."""
+    x, y = extract_features("PJME")
+    x = np.asfortranarray(x, dtype=np.float64)
+    model = GradientBoostingRegressor(
+        n_estimators=3,
+        max_depth=5,
+        splitter=splitter,
+    )
+    tracemalloc.start()
+    try:
+        model.train(x, y)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < PEAK_MEMORY_LIMIT * x.nbytes
+
+
+@pytest.mark.parametrize("splitter", ["exact", "histogram"])
+def test_fit_returns_leaves_of_sampled_rows(splitter: str) -> None:
+    """Training leaves match `apply`, rows out of the sample get none."""
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(500, 5))
+    y = x[:, 0] + rng.normal(size=500)
+    sample = np.sort(rng.choice(500, 300, replace=False))
+    tree = DecisionTreeRegressor(max_depth=4, splitter=splitter)
+    leaves = tree.fit(x, y, sample_indices=sample)
+    np.testing.assert_array_equal(leaves[sample], tree.apply(x[sample]))
+    out_of_bag = np.setdiff1d(np.arange(500), sample)
+    assert (leaves[out_of_bag] == TREE_LEAF).all()
+
+
+@pytest.mark.parametrize("subsample", [1.0, 0.5])
+@pytest.mark.parametrize("splitter", ["exact", "histogram"])
+def test_training_predictions_match_full_prediction(
+    splitter: str,
+    subsample: float,
+) -> None:
+    """Predictions updated from leaves equal a full `predict` pass."""
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2000, 5))
+    y = np.sin(x[:, 0]) + x[:, 1] ** 2 + rng.normal(size=2000)
+    losses = []
+    model = GradientBoostingRegressor(
+        n_estimators=10,
+        learning_rate=0.3,
+        max_depth=3,
+        splitter=splitter,
+        subsample=subsample,
+        random_state=0,
+    )
+    model.train(x, y, progress=lambda progress: losses.append(progress.loss))
+    # Потери считаются по текущим предсказаниям обучения, поэтому точное
+    # равенство на каждом шаге означает совпадение самих предсказаний
+    assert losses == [
+        float(np.mean((y - y_pred) ** 2)) for y_pred in model.staged_predict(x)
+    ]
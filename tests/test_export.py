@@ -0,0 +1,67 @@
+"""Streaming export tests."""
+
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pandas as pd
+import pytest
+from library.export import FRAME_WRITERS, export_frame, frame_chunks
+
+
+@pytest.fixture(params=[0, 5], ids=["empty", "rows"])
+def data_frame(request: pytest.FixtureRequest) -> pd.DataFrame:
+    """Prediction frame with the given number of rows."""
+    return pd.DataFrame(
+        {
+            "Datetime": pd.date_range(
+                "2018-01-01",
+                periods=request.param,
+                freq="h",
+            ),
+            "MW": [float(i) for i in range(request.param)],
+        },
+    )
+
+
+def test_frame_chunks_of_empty_frame() -> None:
+    """An empty frame still gives one chunk with its columns."""
+    chunks = list(frame_chunks(pd.DataFrame(columns=["Datetime", "MW"])))
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert list(chunks[0].columns) == ["Datetime", "MW"]
+
+
+def test_csv_matches_pandas(data_frame: pd.DataFrame, tmp_path: Path) -> None:
+    """CSV export writes the same text as `DataFrame.to_csv`."""
+    path = tmp_path / "prediction.csv"
+    export_frame(data_frame, path, progress=lambda *_: None)
+    assert path.read_text() == data_frame.to_csv(lineterminator="\n")
+
+
+@pytest.mark.parametrize("suffix", [".html", ".xml"])
+def test_markup_is_well_formed(
+    data_frame: pd.DataFrame,
+    tmp_path: Path,
+    suffix: str,
+) -> None:
+    """HTML and XML exports parse and keep one element per row."""
+    path = tmp_path / f"prediction{suffix}"
+    export_frame(data_frame, path)
+    root = ET.parse(path).getroot()  # noqa: S314
+    if suffix == ".html":
+        assert [th.text for th in root.iter("th")][1:3] == ["Datetime", "MW"]
+        assert len(root.find("tbody")) == len(data_frame)
+    else:
+        assert len(root) == len(data_frame)
+
+
+@pytest.mark.parametrize("suffix", sorted(FRAME_WRITERS))
+def test_every_format_writes_file(
+    data_frame: pd.DataFrame,
+    tmp_path: Path,
+    suffix: str,
+) -> None:
+    """Every format writes a file for empty and non-empty frames."""
+    path = tmp_path / f"prediction{suffix}"
+    export_frame(data_frame, path)
+    assert path.exists()
@@ -0,0 +1,98 @@
+"""Calendar feature engine tests."""
+
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from library.features import FEATURE_COLUMNS, calendar_features, to_hours
+from library.functional import extract_features, iter_predictions
+from library.store import load_series
+
+
+def pandas_features(timestamps: pd.DatetimeIndex) -> np.ndarray:
+    """Compute features with the `.dt` formulas used before the engine."""
+    dt = pd.Series(timestamps).dt
+    columns = {
+        "year": dt.year,
+        "month": dt.month,
+        "day": dt.day,
+        "hour": dt.hour,
+        "dayofweek": dt.dayofweek,
+        "is_weekend": dt.dayofweek >= 5,
+        "quarter": dt.quarter,
+        "dayofyear": dt.dayofyear,
+        "weekofyear": dt.isocalendar().week,
+        "day_sin": np.sin(dt.day),
+        "day_cos": np.cos(dt.day),
+        "hour_sin": np.sin(dt.hour),
+        "hour_cos": np.cos(dt.hour),
+        "month_sin": np.sin(dt.month),
+        "month_cos": np.cos(dt.month),
+    }
+    return np.column_stack(
+        [
+            columns[column].to_numpy(dtype=np.float64)
+            for column in FEATURE_COLUMNS
+        ],
+    ).astype(np.float32)
+
+
+@pytest.mark.parametrize(
+    ("start", "end"),
+    [
+        # Несколько веков, включая невисокосные 1900 и 2100 годы
+        ("1899-12-25", "2101-01-10"),
+        # Один час и отрезок короче суток
+        ("2020-02-29 23:00", "2020-02-29 23:00"),
+        ("1969-12-31 20:00", "1970-01-01 05:00"),
+    ],
+)
+def test_calendar_features_match_pandas(start: str, end: str) -> None:
+    """The NumPy engine gives the pandas features bit for bit."""
+    timestamps = pd.date_range(start, end, freq="1h")
+    features = calendar_features(to_hours(timestamps.to_numpy()))
+    assert features.dtype == np.float32
+    assert features.flags.c_contiguous
+    expected = pandas_features(timestamps)
+    for i, column in enumerate(FEATURE_COLUMNS):
+        np.testing.assert_array_equal(
+            features[:, i],
+            expected[:, i],
+            err_msg=column,
+        )
+
+
+def test_calendar_features_of_unsorted_hours() -> None:
+    """Sparse and unordered hours give the features of each hour."""
+    timestamps = pd.DatetimeIndex(
+        ["2100-03-01 12:00", "1900-02-28 00:00", "2021-01-03 23:00"],
+    )
+    np.testing.assert_array_equal(
+        calendar_features(to_hours(timestamps.to_numpy())),
+        pandas_features(timestamps),
+    )
+
+
+def test_training_features_match_prediction_features() -> None:
+    """Training rows and predictions for the same hours share features."""
+    x, _ = extract_features("PJME")
+    hours, _ = load_series("PJME")
+    first_hour = int(hours[len(hours) // 2])
+    start = datetime.fromtimestamp(first_hour * 3600, tz=UTC).replace(
+        tzinfo=None,
+    )
+    end = start + timedelta(days=60)
+    predicted = pd.concat(iter_predictions("PJME", start, end))
+    prediction_x = predicted[list(FEATURE_COLUMNS)].to_numpy(
+        dtype=np.float32,
+    )
+
+    rows = np.flatnonzero(
+        (hours >= first_hour) & (hours <= first_hour + len(predicted) - 1),
+    )
+    assert len(rows) > 1000
+    np.testing.assert_array_equal(
+        x[rows],
+        prediction_x[hours[rows] - first_hour],
+    )
@@ -0,0 +1,52 @@
+"""Model training and prediction helper tests."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from library import functional
+from library.boosting import GradientBoostingRegressor
+from library.model_file import CompactModel, ModelFileError
+
+
+def test_load_model_checks_feature_schema(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """A model trained on other features is not loaded for warm start."""
+    monkeypatch.setattr(functional, "MODELS_DIRECTORY", tmp_path)
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(200, 2))
+    model = GradientBoostingRegressor(n_estimators=2, max_depth=2)
+    model.train(x, x[:, 0])
+    CompactModel.from_regressor(model, ("old", "schema")).save(
+        functional.model_path("TEST"),
+    )
+    with pytest.raises(ModelFileError):
+        functional.load_model("TEST")
+
+
+def test_split_validation_selects_by_time() -> None:
+    """The validation split keeps the last weeks even with gaps."""
+    # Две недели пропуска перед последней неделей ряда
+    hours = np.concatenate(
+        [np.arange(1000), np.arange(1000 + 2 * 168, 1000 + 3 * 168)],
+    )
+    x = hours[:, None].astype(np.float32)
+    (x_train, y_train), (x_valid, y_valid) = functional.split_validation(
+        hours,
+        x,
+        hours,
+        2,
+    )
+    # Счёт строк забрал бы в проверку и 168 часов до пропуска
+    assert len(x_valid) == len(y_valid) == 168
+    assert y_valid[0] == 1000 + 2 * 168
+    assert len(x_train) == len(y_train) == 1000
+
+
+def test_split_validation_rejects_empty_train() -> None:
+    """Too many validation weeks leave nothing to train on."""
+    hours = np.arange(3 * 168)
+    with pytest.raises(ValueError, match="No samples left"):
+        functional.split_validation(hours, hours[:, None], hours, 3)
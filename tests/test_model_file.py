@@ -0,0 +1,81 @@
+"""Compact model file tests."""
+
+import copy
+from pathlib import Path
+
+import numpy as np
+import pytest
+from library.boosting import GradientBoostingRegressor
+from library.model_file import CompactModel, ModelFileError
+
+FEATURE_COLUMNS = ("a", "b", "c")
+
+
+@pytest.fixture(scope="module")
+def model() -> CompactModel:
+    """Get a small trained ensemble."""
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(500, len(FEATURE_COLUMNS)))
+    regressor = GradientBoostingRegressor(n_estimators=3, max_depth=3)
+    regressor.train(x, x[:, 0] + x[:, 1] ** 2)
+    return CompactModel.from_regressor(regressor, FEATURE_COLUMNS)
+
+
+def save_damaged(
+    model: CompactModel,
+    path: Path,
+    name: str,
+    index: int,
+    value: int,
+) -> Path:
+    """Save a copy of the model with one array element replaced."""
+    damaged = copy.copy(model)
+    array = getattr(model, name).copy()
+    array[index] = value
+    setattr(damaged, name, array)
+    damaged.save(path)
+    return path
+
+
+def test_round_trip(model: CompactModel, tmp_path: Path) -> None:
+    """A saved model predicts the same after loading."""
+    x = np.random.default_rng(1).normal(size=(100, len(FEATURE_COLUMNS)))
+    model.save(tmp_path / "model.gbm")
+    loaded = CompactModel.load(tmp_path / "model.gbm")
+    np.testing.assert_array_equal(loaded.predict(x), model.predict(x))
+
+
+@pytest.mark.parametrize(
+    ("name", "index", "value"),
+    [
+        # Узел, ссылающийся на себя, зациклил бы предсказание
+        ("left", 0, 0),
+        ("right", 0, -5),
+        ("left", 0, 1000),
+        ("feature", 0, len(FEATURE_COLUMNS)),
+        ("feature", 0, -2),
+        ("tree_offsets", 0, 1),
+        ("tree_offsets", 1, 0),
+        ("tree_offsets", -1, 10_000),
+    ],
+    ids=str,
+)
+def test_damaged_nodes_are_rejected(
+    model: CompactModel,
+    tmp_path: Path,
+    name: str,
+    index: int,
+    value: int,
+) -> None:
+    """Invalid tree structure raises `ModelFileError` on load."""
+    path = save_damaged(model, tmp_path / "model.gbm", name, index, value)
+    with pytest.raises(ModelFileError):
+        CompactModel.load(path)
+
+
+def test_damaged_magic_is_rejected(tmp_path: Path) -> None:
+    """A file of another format is not loaded."""
+    path = tmp_path / "model.gbm"
+    path.write_bytes(b"not a model file at all")
+    with pytest.raises(ModelFileError):
+        CompactModel.load(path)
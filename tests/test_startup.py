@@ -0,0 +1,35 @@
+"""Startup profiling tests."""
+
+import pytest
+from library.ui.startup import parse_import_times, profile_startup
+
+from tests.conftest import ROOT
+
+IMPORT_TIME_LOG = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2051 |      35210 | numpy
+some warning printed by a module
+import time:        87 |      35297 |     library.ui.app
+"""
+
+
+def test_parse_import_times() -> None:
+    """Only timing rows are parsed, keeping module indentation."""
+    assert parse_import_times(IMPORT_TIME_LOG) == [
+        (120, 120, "   _io"),
+        (2051, 35210, " numpy"),
+        (87, 35297, "     library.ui.app"),
+    ]
+
+
+def test_first_paint_within_limit(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """The window is painted in time and before any heavy import."""
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    status = profile_startup(ROOT / "main.py")
+    output = capsys.readouterr().out
+    assert "Heavy modules before first paint: none" in output
+    assert status == 0, output